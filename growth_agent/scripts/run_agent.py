@@ -9,6 +9,8 @@ import asyncio
 import sys
 import os
 import argparse
+import json
+import random
 from datetime import datetime, timezone
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
@@ -18,83 +20,90 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from src import config, db
+from src import brain, config, db
+from src.brain import think_batched, think_followup_dm, think_dm
 from src.models import Message, BrainDecision
 
 _DM_COOLDOWN_SEC = 86400  # 24 hours per user
 _MAX_OUTBOUND_DMS_PER_DAY = 5  # limit follow-up DMs to avoid Telegram restrictions
 _FOLLOWUP_DM_DELAY_SEC = (120, 300)  # 2-5 min delay before sending DM
+_FOLLOWUP_DM_DELAY_SPAN = _FOLLOWUP_DM_DELAY_SEC[1] - _FOLLOWUP_DM_DELAY_SEC[0] + 1
+_MAX_INFLIGHT_MESSAGES = 8  # concurrent Brain → Actor pipelines (matches brain.BATCH_MAX_SIZE)
 
 
 async def on_message(message: Message, actor, client) -> None:
     """Pipeline: Message → Brain → Actor → Follow-up DM."""
-    import random
-    from src.brain import think, think_followup_dm
-
-    decision: BrainDecision = await think(message)
-    sent = await actor.act(message, decision)
-
-    # If we replied in chat — send follow-up DM to the message author
-    if sent and decision.response_text:
-        outbound_today = await db.count_outbound_dms_today()
-        if outbound_today >= _MAX_OUTBOUND_DMS_PER_DAY:
-            logger.debug("Outbound DM limit reached ({}/day), skipping follow-up", _MAX_OUTBOUND_DMS_PER_DAY)
-            return
-
-        dm_text = await think_followup_dm(
-            question=message.text,
-            chat_response=decision.response_text,
-        )
-        if not dm_text:
-            return
-
-        # Delay to seem natural (2-5 min after chat response)
-        delay = random.randint(*_FOLLOWUP_DM_DELAY_SEC)
-        logger.info("Scheduling follow-up DM in {}s to {} | {}", delay, message.sender_name, dm_text[:60])
-
-        async def _send_followup():
-            await asyncio.sleep(delay)
-            try:
-                # Resolve user by replying to the original message's sender
-                # We get the chat message and extract sender
-                chats = await db.get_active_chats()
-                chat_map = {c["id"]: c["telegram_id"] for c in chats}
-                tg_chat_id = chat_map.get(message.chat_id)
-                if not tg_chat_id:
-                    return
+    decision: BrainDecision = await think_batched(message)
 
-                # Get the original Telegram message to find sender
-                tg_msgs = await client.get_messages(tg_chat_id, ids=message.telegram_message_id)
-                if not tg_msgs or not tg_msgs.sender_id:
-                    logger.warning("Could not resolve sender for follow-up DM")
-                    return
+    async def followup() -> None:
+        await send_followup_dm(message, decision, actor, client)
+
+    # Actor delivers the reply in the background (act() only reports that it
+    # was scheduled); the follow-up DM is triggered once it was actually sent.
+    if await actor.act(message, decision, on_sent=followup):
+        logger.debug("Reply to message {} scheduled", message.id)
+
+
+async def send_followup_dm(message: Message, decision: BrainDecision, actor, client) -> None:
+    """After replying in chat — send follow-up DM to the message author."""
+    if not decision.response_text:
+        return
+
+    outbound_today = await db.count_outbound_dms_today()
+    if outbound_today >= _MAX_OUTBOUND_DMS_PER_DAY:
+        logger.debug("Outbound DM limit reached ({}/day), skipping follow-up", _MAX_OUTBOUND_DMS_PER_DAY)
+        return
 
-                target_user_id = tg_msgs.sender_id
+    dm_text = await think_followup_dm(
+        question=message.text,
+        chat_response=decision.response_text,
+    )
+    if not dm_text:
+        return
 
-                # Check if we already DM'd this user recently
-                last = await db.get_last_dm_response_time(target_user_id)
-                if last:
-                    elapsed = (datetime.now(timezone.utc) - last).total_seconds()
-                    if elapsed < _DM_COOLDOWN_SEC:
-                        logger.debug("Follow-up DM skipped — already DM'd user {} recently", target_user_id)
-                        return
+    # Delay to seem natural (2-5 min after chat response)
+    delay = _FOLLOWUP_DM_DELAY_SEC[0] + int(random.random() * _FOLLOWUP_DM_DELAY_SPAN)
+    logger.info("Scheduling follow-up DM in {}s to {} | {}", delay, message.sender_name, dm_text[:60])
 
-                await client.send_message(entity=target_user_id, message=dm_text)
-                await db.save_dm(
-                    target_user_id, message.sender_name, f"[followup] {message.text[:100]}",
-                    dm_type="followup", response_text=dm_text, responded=True
-                )
-                logger.info("Follow-up DM sent to {} ({}): {}", target_user_id, message.sender_name, dm_text[:60])
-            except Exception as e:
-                logger.error("Follow-up DM failed to {}: {}", message.sender_name, e)
+    async def _send_followup():
+        await asyncio.sleep(delay)
+        try:
+            # Resolve user by replying to the original message's sender
+            # We get the chat message and extract sender
+            peer = await actor.resolve_peer(message.chat_id)
+            if peer is None:
+                return
+
+            # Get the original Telegram message to find sender
+            tg_msgs = await client.get_messages(peer, ids=message.telegram_message_id)
+            if not tg_msgs or not tg_msgs.sender_id:
+                logger.warning("Could not resolve sender for follow-up DM")
+                return
+
+            target_user_id = tg_msgs.sender_id
+
+            # Check if we already DM'd this user recently
+            last = await db.get_last_dm_response_time(target_user_id)
+            if last:
+                elapsed = (datetime.now(timezone.utc) - last).total_seconds()
+                if elapsed < _DM_COOLDOWN_SEC:
+                    logger.debug("Follow-up DM skipped — already DM'd user {} recently", target_user_id)
+                    return
 
-        asyncio.create_task(_send_followup())
+            await client.send_message(entity=target_user_id, message=dm_text)
+            await db.save_dm(
+                target_user_id, message.sender_name, f"[followup] {message.text[:100]}",
+                dm_type="followup", response_text=dm_text, responded=True
+            )
+            logger.info("Follow-up DM sent to {} ({}): {}", target_user_id, message.sender_name, dm_text[:60])
+        except Exception as e:
+            logger.error("Follow-up DM failed to {}: {}", message.sender_name, e)
+
+    asyncio.create_task(_send_followup())
 
 
 async def on_dm(sender_id: int, sender_name: str, text: str, client) -> None:
     """Pipeline: DM → classify → respond → persist to DB."""
-    from src.brain import think_dm
-
     now = datetime.now(timezone.utc)
 
     # Rate limit check from DB (persistent across restarts)
@@ -144,8 +153,19 @@ async def run_mock() -> None:
     assert config.TG_PHONE, "TG_PHONE not set!"
     logger.info("  -> Config OK")
 
-    # Test 2: Relevance scoring
-    from src.relevance import compute_relevance as _compute_relevance
+    # Test 2 (CPU) and Test 3 (network) are independent — run them together
+    if config.ANTHROPIC_API_KEY:
+        await asyncio.gather(_test_llm(), _test_relevance())
+    else:
+        await _test_relevance()
+        logger.info("\nClaude test: SKIPPED (ANTHROPIC_API_KEY not configured)")
+
+    logger.info("\n=== Mock run complete ===")
+
+
+async def _test_relevance() -> bool:
+    """Mock test: relevance scoring on a few sample messages."""
+    from src.relevance import compute_relevance_batch
     test_cases = [
         ("Какая маржа сейчас на чехлах для телефонов на WB?", True),
         ("Всем привет, как дела?", False),
@@ -155,51 +175,43 @@ async def run_mock() -> None:
     ]
     logger.info("\nRelevance scoring test:")
     all_ok = True
-    for text, expected_relevant in test_cases:
-        score = _compute_relevance(text)
+    scores = compute_relevance_batch([text for text, _ in test_cases])
+    for (text, expected_relevant), score in zip(test_cases, scores):
         is_relevant = score >= config.MIN_RELEVANCE_SCORE
         ok = is_relevant == expected_relevant
         if not ok:
             all_ok = False
         logger.info("  [{}] score={:.2f} relevant={} | {}", "OK" if ok else "FAIL", score, is_relevant, text[:60])
     logger.info("  -> Relevance {}", "OK" if all_ok else "HAS FAILURES")
+    return all_ok
 
-    # Test 3: Claude API
-    if config.ANTHROPIC_API_KEY:
+
+async def _test_llm() -> bool:
+    """Mock test: one real decision call to Claude API."""
+    try:
+        brain.init_client()
+
+        prompt_text = brain.DECISION_PROMPT.format(
+            text="Какая маржа сейчас на чехлах для телефонов на WB?",
+            sender="TestUser",
+            context="(тестовый запуск)",
+        )
+        logger.info("\nClaude API test:")
         try:
-            import json
-            from src.brain import init_client, _call_llm, SYSTEM_PROMPT, DECISION_PROMPT
-            init_client()
-
-            prompt_text = DECISION_PROMPT.format(
-                text="Какая маржа сейчас на чехлах для телефонов на WB?",
-                sender="TestUser",
-                context="(тестовый запуск)",
-            )
-            messages = [
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt_text},
-            ]
-            logger.info("\nClaude API test:")
-            try:
-                raw = await _call_llm(messages)
-                clean = raw.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
-                data = json.loads(clean)
-                logger.info("  Claude response: {}", json.dumps(data, ensure_ascii=False, indent=2))
-                logger.info("  -> Claude API OK")
-            except Exception as e:
-                logger.error("  Claude call failed: {}", e)
+            raw = await brain._call_llm(brain._user_turn(prompt_text), system=brain.DECISION_SYSTEM)
+            data = brain._parse_json_response(raw)
+            logger.info("  Claude response: {}", json.dumps(data, ensure_ascii=False, indent=2))
+            logger.info("  -> Claude API OK")
+            return True
         except Exception as e:
-            logger.warning("\nClaude test: SKIPPED ({})", e)
-    else:
-        logger.info("\nClaude test: SKIPPED (ANTHROPIC_API_KEY not configured)")
-
-    logger.info("\n=== Mock run complete ===")
+            logger.error("  Claude call failed: {}", e)
+    except Exception as e:
+        logger.warning("\nClaude test: SKIPPED ({})", e)
+    return False
 
 
 async def run_live() -> None:
     """Full live run with Telethon + Claude API + PostgreSQL."""
-    from src import db, brain
     from src.listener import Listener
     from src.actor import Actor
     from src.scheduler import run_daily_tasks
@@ -219,6 +231,7 @@ async def run_live() -> None:
 
     # Initialize DB
     await db.init_pool(config.POSTGRES_DSN)
+    db.start_writer()
 
     # Initialize Claude API client
     brain.init_client()
@@ -231,8 +244,17 @@ async def run_live() -> None:
     # Actor uses Listener's connected Telethon client
     actor = Actor(listener._client)
 
+    # Telethon runs each update in its own task; the semaphore bounds how many
+    # of them wait on Claude at once during a burst instead of letting every
+    # relevant message open a request.
+    pipeline_slots = asyncio.Semaphore(_MAX_INFLIGHT_MESSAGES)
+
     async def message_handler(message: Message) -> None:
-        await on_message(message, actor, listener._client)
+        if pipeline_slots.locked():
+            logger.debug("Brain pipeline busy ({} in flight), message {} waits",
+                         _MAX_INFLIGHT_MESSAGES, message.id)
+        async with pipeline_slots:
+            await on_message(message, actor, listener._client)
 
     async def dm_callback(sender_id: int, sender_name: str, text: str) -> None:
         await on_dm(sender_id, sender_name, text, listener._client)
@@ -250,7 +272,11 @@ async def run_live() -> None:
     except KeyboardInterrupt:
         logger.info("Shutting down...")
     finally:
+        # Pending sends need both the Telethon client and the DB writer.
+        await actor.shutdown()
         await listener.stop()
+        await brain.close_client()
+        await db.stop_writer()
         await db.close_pool()
 
 
@@ -259,6 +285,11 @@ def main():
     parser.add_argument("--mock", action="store_true", help="Run in mock mode (no real TG)")
     args = parser.parse_args()
 
+    # loguru's default sink logs everything from DEBUG up; below LOG_LEVEL the
+    # per-message debug calls are dropped before any formatting happens.
+    logger.remove()
+    logger.add(sys.stderr, level=config.LOG_LEVEL)
+
     if args.mock:
         asyncio.run(run_mock())
     else:
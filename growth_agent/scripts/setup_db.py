@@ -98,17 +98,18 @@ async def main():
         print("ERROR: POSTGRES_DSN not set in .env")
         sys.exit(1)
 
-    conn = await asyncpg.connect(DSN)
+    pool = await asyncpg.create_pool(DSN, min_size=1, max_size=4, statement_cache_size=256)
     try:
-        await conn.execute(SQL)
-        print("All tables created (or already exist).")
-
-        tables = await conn.fetch(
-            "SELECT tablename FROM pg_tables WHERE schemaname = 'public'"
-        )
-        print("Tables in database:", [t["tablename"] for t in tables])
+        async with pool.acquire() as conn:
+            await conn.execute(SQL)
+            print("All tables created (or already exist).")
+
+            tables = await conn.fetchval(
+                "SELECT array_agg(tablename ORDER BY tablename) FROM pg_tables WHERE schemaname = 'public'"
+            )
+            print("Tables in database:", tables or [])
     finally:
-        await conn.close()
+        await pool.close()
 
 
 if __name__ == "__main__":
@@ -31,6 +31,17 @@ TG_PHONE = os.getenv("TG_PHONE", "")
 TG_SESSION_NAME = os.getenv("TG_SESSION_NAME", "growth_agent")
 POSTGRES_DSN = os.getenv("POSTGRES_DSN", "")
 
+# New chats are inserted as 'joined'; existing ones keep their status/topic.
+UPSERT_SQL = """
+    INSERT INTO chats (telegram_id, title, topic, member_count,
+                       our_status, joined_at, last_activity)
+    VALUES ($1, $2, $3, $4, 'joined', $5, $5)
+    ON CONFLICT (telegram_id) DO UPDATE SET
+        title = EXCLUDED.title,
+        member_count = EXCLUDED.member_count,
+        last_activity = EXCLUDED.last_activity
+"""
+
 
 async def main():
     if not POSTGRES_DSN:
@@ -42,13 +53,37 @@ async def main():
 
     import asyncpg
 
-    conn = await asyncpg.connect(POSTGRES_DSN)
     client = TelegramClient(TG_SESSION_NAME, TG_API_ID, TG_API_HASH)
-    await client.start(phone=TG_PHONE)
 
+    async def fetch_dialogs():
+        await client.start(phone=TG_PHONE)
+        return await client.get_dialogs()
+
+    # DB connect and Telegram login/dialog fetch are independent — overlap them.
+    # return_exceptions lets both finish, so if one side fails the other one
+    # (an open pool or a logged-in client) can still be closed.
     try:
-        dialogs = await client.get_dialogs()
-        synced = 0
+        pool, dialogs = await asyncio.gather(
+            asyncpg.create_pool(
+                POSTGRES_DSN, min_size=1, max_size=4, statement_cache_size=256
+            ),
+            fetch_dialogs(),
+            return_exceptions=True,
+        )
+    except BaseException:
+        await client.disconnect()
+        raise
+
+    failure = next((r for r in (pool, dialogs) if isinstance(r, BaseException)), None)
+    if failure is not None:
+        await client.disconnect()
+        if not isinstance(pool, BaseException):
+            await pool.close()
+        raise failure
+
+    try:
+        now = datetime.now(timezone.utc)
+        rows = []
 
         for dialog in dialogs:
             entity = dialog.entity
@@ -66,43 +101,36 @@ async def main():
             telegram_id = dialog.id
             title = dialog.title or ""
             members = getattr(entity, "participants_count", 0) or 0
-
-            row = await conn.fetchrow(
-                "SELECT id, our_status FROM chats WHERE telegram_id = $1",
-                telegram_id,
-            )
-
-            if row:
-                # Update existing
-                await conn.execute(
-                    """UPDATE chats SET title = $1, member_count = $2,
-                       last_activity = $3 WHERE telegram_id = $4""",
-                    title, members, datetime.now(timezone.utc), telegram_id,
+            rows.append((telegram_id, title, "T1", members, now))
+
+        # One lookup for existing statuses (for the report), one batched upsert
+        async with pool.acquire() as conn:
+            existing = {
+                r["telegram_id"]: r["our_status"]
+                for r in await conn.fetch(
+                    "SELECT telegram_id, our_status FROM chats WHERE telegram_id = ANY($1::bigint[])",
+                    [r[0] for r in rows],
                 )
-                status = row["our_status"]
+            }
+            await conn.executemany(UPSERT_SQL, rows)
+
+        for telegram_id, title, _, members, _ in rows:
+            status = existing.get(telegram_id)
+            if status:
                 print(f"  updated: {title} ({members} members) [{status}]")
             else:
-                # Insert new as 'joined'
-                await conn.execute(
-                    """INSERT INTO chats (telegram_id, title, topic, member_count,
-                       our_status, joined_at, last_activity)
-                       VALUES ($1, $2, $3, $4, 'joined', $5, $5)""",
-                    telegram_id, title, "T1", members,
-                    datetime.now(timezone.utc),
-                )
                 print(f"  NEW: {title} ({members} members) [joined]")
-
-            synced += 1
+        synced = len(rows)
 
         # Summary
-        total = await conn.fetchval(
+        total = await pool.fetchval(
             "SELECT COUNT(*) FROM chats WHERE our_status = 'joined'"
         )
         print(f"\nSynced {synced} groups. Active chats in DB: {total}")
 
     finally:
         await client.disconnect()
-        await conn.close()
+        await pool.close()
 
 
 if __name__ == "__main__":
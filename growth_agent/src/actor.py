@@ -2,25 +2,77 @@
 
 import asyncio
 import random
+import time
 from datetime import datetime, timezone
+from typing import Awaitable, Callable
 
 from loguru import logger
 from telethon import TelegramClient
+from telethon.tl.types import TypeInputPeer
 
 from . import config, db
 from .models import Message, BrainDecision, Response
 
 
+TG_ID_CACHE_TTL_SEC = 300
+_DELAY_SPAN = config.MAX_DELAY_BEFORE_REPLY_SEC - config.MIN_DELAY_BEFORE_REPLY_SEC + 1
+
+
 class Actor:
     def __init__(self, client: TelegramClient):
         self._client = client
+        self._tg_id_cache: dict[int, tuple[int, float]] = {}  # chat_id -> (telegram_id, fetched_at)
+        self._pending_sends: set[asyncio.Task] = set()  # keep strong refs to running sends
+        self._peer_cache: dict[int, TypeInputPeer] = {}  # telegram_id -> resolved InputPeer
+        self._pending_timers: dict[tuple[int, int], asyncio.TimerHandle] = {}  # (chat_id, tg msg id) -> delayed send
+        self._closed = False
+
+    async def _get_telegram_id(self, chat_id: int) -> int | None:
+        """Resolve internal chat_id to telegram_id, cached for TG_ID_CACHE_TTL_SEC."""
+        cached = self._tg_id_cache.get(chat_id)
+        now = time.monotonic()
+        if cached and now - cached[1] < TG_ID_CACHE_TTL_SEC:
+            return cached[0]
+        tg_chat_id = await db.get_telegram_id(chat_id)
+        if tg_chat_id:
+            self._tg_id_cache[chat_id] = (tg_chat_id, now)
+        return tg_chat_id
+
+    async def _get_peer(self, tg_chat_id: int) -> TypeInputPeer:
+        """Resolve telegram_id to an InputPeer once and reuse it for later sends."""
+        peer = self._peer_cache.get(tg_chat_id)
+        if peer is None:
+            peer = await self._client.get_input_entity(tg_chat_id)
+            self._peer_cache[tg_chat_id] = peer
+        return peer
+
+    async def resolve_peer(self, chat_id: int) -> TypeInputPeer | None:
+        """InputPeer for an internal chat_id, or None if the chat has no telegram_id.
+
+        Uses the same caches as reply sending, for callers outside Actor.
+        """
+        tg_chat_id = await self._get_telegram_id(chat_id)
+        if not tg_chat_id:
+            return None
+        return await self._get_peer(tg_chat_id)
 
-    async def act(self, message: Message, decision: BrainDecision) -> bool:
+    async def act(
+        self,
+        message: Message,
+        decision: BrainDecision,
+        on_sent: Callable[[], Awaitable[None]] | None = None,
+    ) -> bool:
         """
-        Send reply if decision says so and limits allow.
-        Returns True if message was sent.
+        Schedule a reply if decision says so and limits allow.
+        Returns True if a reply was scheduled — not that it was delivered;
+        the send may still be skipped by the re-check after the delay, fail,
+        or be dropped by shutdown().
+
+        The send itself runs after a random human-like delay via
+        loop.call_later, so the caller is not held for minutes.
+        on_sent is awaited only after the reply was actually delivered.
         """
-        if not decision.should_respond or not decision.response_text:
+        if self._closed or not decision.should_respond or not decision.response_text:
             return False
 
         # Check schedule limits
@@ -33,13 +85,51 @@ class Actor:
             return False
 
         # Random human-like delay
-        delay = random.randint(
-            config.MIN_DELAY_BEFORE_REPLY_SEC,
-            config.MAX_DELAY_BEFORE_REPLY_SEC,
+        delay = config.MIN_DELAY_BEFORE_REPLY_SEC + int(random.random() * _DELAY_SPAN)
+        logger.debug("Reply in chat {} scheduled in {} sec", message.chat_id, delay)
+        self._pending_timers[(message.chat_id, message.telegram_message_id)] = asyncio.get_running_loop().call_later(
+            delay, self._start_send, message, decision, on_sent
         )
-        logger.debug("Waiting {} sec before reply...", delay)
-        await asyncio.sleep(delay)
+        return True
+
+    async def shutdown(self) -> None:
+        """Drop replies still waiting out their delay and wait for sends in flight.
+
+        Must run while the Telethon client and the DB pool are still open.
+        """
+        self._closed = True
+        if self._pending_timers:
+            logger.warning("Dropping {} scheduled replies on shutdown", len(self._pending_timers))
+            for handle in self._pending_timers.values():
+                handle.cancel()
+            self._pending_timers.clear()
+        if self._pending_sends:
+            logger.info("Waiting for {} replies being sent", len(self._pending_sends))
+            await asyncio.gather(*self._pending_sends, return_exceptions=True)
+
+    def _start_send(
+        self,
+        message: Message,
+        decision: BrainDecision,
+        on_sent: Callable[[], Awaitable[None]] | None,
+    ) -> None:
+        self._pending_timers.pop((message.chat_id, message.telegram_message_id), None)
+        task = asyncio.create_task(self._do_send(message, decision, on_sent))
+        self._pending_sends.add(task)
+        task.add_done_callback(self._on_send_done)
 
+    def _on_send_done(self, task: asyncio.Task) -> None:
+        self._pending_sends.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Scheduled reply failed: {}", task.exception())
+
+    async def _do_send(
+        self,
+        message: Message,
+        decision: BrainDecision,
+        on_sent: Callable[[], Awaitable[None]] | None,
+    ) -> bool:
+        """Deliver a scheduled reply. Returns True if message was sent."""
         # Re-check limits after delay (prevents race condition with concurrent messages)
         allowed = await db.is_chat_allowed(message.chat_id)
         if not allowed:
@@ -50,9 +140,7 @@ class Actor:
             return False
 
         # Get telegram_id of the chat
-        chats = await db.get_active_chats()
-        chat_map = {c["id"]: c["telegram_id"] for c in chats}
-        tg_chat_id = chat_map.get(message.chat_id)
+        tg_chat_id = await self._get_telegram_id(message.chat_id)
         if not tg_chat_id:
             logger.error("Cannot find telegram_id for chat_id={}", message.chat_id)
             return False
@@ -60,13 +148,15 @@ class Actor:
         # Send reply
         try:
             await self._client.send_message(
-                entity=tg_chat_id,
+                entity=await self._get_peer(tg_chat_id),
                 message=decision.response_text,
                 reply_to=message.telegram_message_id,
             )
         except Exception as e:
             error_str = str(e)
             logger.error("Failed to send message in chat {}: {}", tg_chat_id, e)
+            self._tg_id_cache.pop(message.chat_id, None)
+            self._peer_cache.pop(tg_chat_id, None)
             # Permanently ban — no point retrying
             if "banned" in error_str.lower() or "you can't write" in error_str.lower():
                 await db.deactivate_chat(message.chat_id, reason=error_str[:120])
@@ -83,11 +173,16 @@ class Actor:
             sent_at=datetime.now(timezone.utc),
             reaction="unknown",
         )
-        await db.save_response(resp)
-        await db.increment_messages_today(message.chat_id)
+        await db.record_response(resp)
 
         logger.info(
             "Replied in chat {} (link={}) | {}",
             tg_chat_id, decision.include_channel_link, decision.response_text[:80]
         )
+
+        if on_sent is not None:
+            try:
+                await on_sent()
+            except Exception as e:
+                logger.error("on_sent callback failed for chat {}: {}", tg_chat_id, e)
         return True
@@ -6,18 +6,23 @@ For each relevant message decides:
   3. After chat response — generate follow-up DM with channel link
 """
 
-import json
+import asyncio
 import re
+import time
+from collections import deque
 from pathlib import Path
 from typing import Optional
 
-from anthropic import AsyncAnthropic
+import httpx
+from anthropic import APITimeoutError, AsyncAnthropic
 from loguru import logger
 
-from . import config, db
+from . import config, db, json_fast
 from .models import Message, BrainDecision
+from .semcache import DecisionCache
 
 _client: Optional[AsyncAnthropic] = None
+_decision_cache = DecisionCache()
 
 _PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 
@@ -30,38 +35,236 @@ def _load_prompt(filename: str) -> str:
 
 
 def init_client() -> None:
-    """Initialize the Claude API client."""
+    """Initialize the Claude API client.
+
+    One client (and one keep-alive connection pool) is shared by every
+    Brain call, so only the first request pays the TCP+TLS handshake.
+    """
     global _client
-    _client = AsyncAnthropic(api_key=config.ANTHROPIC_API_KEY)
+    http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+    )
+    _client = AsyncAnthropic(api_key=config.ANTHROPIC_API_KEY, http_client=http_client)
+
+
+async def close_client() -> None:
+    """Stop the batch worker, finish in-flight batches, close the Claude client."""
+    global _client, _batch_worker, _batch_queue
+    if _batch_worker is not None:
+        _batch_worker.cancel()
+        try:
+            await _batch_worker
+        except asyncio.CancelledError:
+            pass
+        _batch_worker = None
+        # Callers still queued get a decline instead of waiting forever
+        while _batch_queue is not None and not _batch_queue.empty():
+            _, future = _batch_queue.get_nowait()
+            if not future.done():
+                future.set_result(BrainDecision(should_respond=False, reason="shutdown"))
+        _batch_queue = None
+    if _flush_tasks:
+        await asyncio.gather(*_flush_tasks, return_exceptions=True)
+    if _client is not None:
+        await _client.close()
+        _client = None
 
 
 # Prompts loaded once at import time.
 SYSTEM_PROMPT = _load_prompt("system_prompt.txt")
+DECISION_RULES = _load_prompt("decision_rules.txt")
 DECISION_PROMPT = _load_prompt("decision_prompt.txt")
+DECISION_BATCH_PROMPT = _load_prompt("decision_batch_prompt.txt")
 DM_SYSTEM_PROMPT = _load_prompt("dm_system_prompt.txt")
 DM_RESPONSE_PROMPT = _load_prompt("dm_response_prompt.txt")
 FOLLOWUP_DM_PROMPT = _load_prompt("followup_dm_prompt.txt")
 
 
-async def _call_llm(messages: list[dict], system: str = "") -> str:
-    """Call Claude API directly."""
+# Request parameters that never change between calls.
+_LLM_PARAMS = {"model": config.CLAUDE_MODEL, "temperature": 0.4}
+
+
+def _cached_system(*parts: str) -> list[dict]:
+    """System prompt as text blocks with a prompt-cache breakpoint after the last one.
+
+    Everything up to the breakpoint is byte-identical across calls, so Claude
+    serves it from the prompt cache and only the short user turn is processed
+    in full. Prefixes shorter than the model's cache minimum are just not cached.
+    """
+    blocks = [{"type": "text", "text": p} for p in parts]
+    blocks[-1]["cache_control"] = {"type": "ephemeral"}
+    return blocks
+
+
+# Static prefixes: persona (+ decision rules), then the per-message user turn.
+DECISION_SYSTEM = _cached_system(SYSTEM_PROMPT, DECISION_RULES)
+CHAT_SYSTEM = _cached_system(SYSTEM_PROMPT)
+DM_SYSTEM = _cached_system(DM_SYSTEM_PROMPT)
+
+
+# Adaptive request timeout: 2× the recent p95 latency, clamped to
+# [_LLM_TIMEOUT_MIN, _LLM_TIMEOUT_MAX]. Until enough samples exist the old
+# fixed 30s applies. Consecutive timeouts double the limit (up to 2× max) so a
+# slow-but-alive API is not cut off on every call.
+# Latencies are kept per window: single decisions (streamed, stopping at the
+# closing brace) are much shorter than batch calls generating up to
+# BATCH_MAX_SIZE answers, so one shared p95 would cut batches off. Samples
+# are stored per _LATENCY_BASE_TOKENS of max_tokens and the timeout is scaled
+# back up, so an 8-item batch is not judged by a window of 2-item ones.
+_LLM_TIMEOUT_MIN = 5.0
+_LLM_TIMEOUT_MAX = 30.0
+_LATENCY_MIN_SAMPLES = 20
+_LATENCY_BASE_TOKENS = 250
+_latencies: dict[str, deque[float]] = {
+    "single": deque(maxlen=512),
+    "batch": deque(maxlen=512),
+}
+_timeout_streak = 0
+_last_timeout: dict[str, float] = {}
+
+
+def _llm_timeout(window: str = "single", max_tokens: int = _LATENCY_BASE_TOKENS) -> float:
+    """Current per-request timeout in seconds for a call of the given window and budget."""
+    latencies = _latencies[window]
+    if len(latencies) < _LATENCY_MIN_SAMPLES:
+        timeout = _LLM_TIMEOUT_MAX
+    else:
+        p95 = sorted(latencies)[int(len(latencies) * 0.95)]
+        scale = max(1.0, max_tokens / _LATENCY_BASE_TOKENS)
+        timeout = max(_LLM_TIMEOUT_MIN, min(_LLM_TIMEOUT_MAX, 2 * p95 * scale))
+    if _timeout_streak:
+        timeout = min(timeout * 2 ** _timeout_streak, 2 * _LLM_TIMEOUT_MAX)
+    previous = _last_timeout.get(window, _LLM_TIMEOUT_MAX)
+    if round(timeout) != round(previous):
+        logger.debug("LLM timeout ({}) {:.0f}s -> {:.0f}s (samples={}, timeouts in a row={})",
+                     window, previous, timeout, len(latencies), _timeout_streak)
+    _last_timeout[window] = timeout
+    return timeout
+
+
+def _record_latency(started: float, window: str = "single",
+                    max_tokens: int = _LATENCY_BASE_TOKENS) -> None:
+    global _timeout_streak
+    scale = max(1.0, max_tokens / _LATENCY_BASE_TOKENS)
+    _latencies[window].append((time.monotonic() - started) / scale)
+    _timeout_streak = 0
+
+
+def _record_timeout() -> None:
+    global _timeout_streak
+    _timeout_streak = min(_timeout_streak + 1, 3)
+
+
+def _user_turn(prompt_text: str) -> list[dict]:
+    """Single-turn messages payload; the system prompt is passed separately."""
+    return [{"role": "user", "content": prompt_text}]
+
+
+async def _call_llm(
+    messages: list[dict],
+    system: str | list[dict] = "",
+    max_tokens: int = 250,
+    latency_window: str = "single",
+) -> str:
+    """Call Claude API directly.
+
+    Pass ``system`` explicitly with user-only ``messages`` (see _user_turn);
+    OpenAI-style lists with a leading system message are still accepted.
+    ``latency_window`` picks the latency history the timeout is derived from.
+    """
     if _client is None:
         raise RuntimeError("Claude client not initialized. Call brain.init_client() first.")
 
-    user_messages = [m for m in messages if m["role"] != "system"]
+    if not system:
+        system = next((m["content"] for m in messages if m["role"] == "system"), "")
+        messages = [m for m in messages if m["role"] != "system"]
 
-    response = await _client.messages.create(
-        model=config.CLAUDE_MODEL,
-        max_tokens=250,
-        temperature=0.4,
-        system=system or next((m["content"] for m in messages if m["role"] == "system"), ""),
-        messages=user_messages,
-    )
+    started = time.monotonic()
+    try:
+        response = await _client.messages.create(
+            **_LLM_PARAMS,
+            max_tokens=max_tokens,
+            system=system,
+            messages=messages,
+            timeout=_llm_timeout(latency_window, max_tokens),
+        )
+    except APITimeoutError:
+        _record_timeout()
+        raise
+    _record_latency(started, latency_window, max_tokens)
     text = response.content[0].text
-    logger.debug("Claude response: model={} tokens={}", config.CLAUDE_MODEL, response.usage.output_tokens)
+    logger.debug(
+        "Claude response: model={} tokens={} cached_in={}",
+        config.CLAUDE_MODEL, response.usage.output_tokens,
+        getattr(response.usage, "cache_read_input_tokens", 0),
+    )
     return text
 
 
+class _JsonObjectScanner:
+    """Tracks brace depth over streamed text to spot when the first JSON object closes."""
+
+    def __init__(self) -> None:
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; True once the top-level object is complete."""
+        for ch in chunk:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == "{":
+                self._depth += 1
+            elif self._depth:
+                if ch == '"':
+                    self._in_string = True
+                elif ch == "}":
+                    self._depth -= 1
+                    if self._depth == 0:
+                        return True
+        return False
+
+
+async def _stream_llm_json(messages: list[dict], system: str | list[dict], max_tokens: int = 250) -> str:
+    """Stream a Claude reply and stop reading once its JSON object is complete.
+
+    Anything the model adds after the closing brace (commentary, fences) is
+    never waited for, which trims tail latency on the decision path.
+    """
+    if _client is None:
+        raise RuntimeError("Claude client not initialized. Call brain.init_client() first.")
+
+    scanner = _JsonObjectScanner()
+    parts: list[str] = []
+    started = time.monotonic()
+    try:
+        async with _client.messages.stream(
+            **_LLM_PARAMS,
+            max_tokens=max_tokens,
+            system=system,
+            messages=messages,
+            timeout=_llm_timeout(max_tokens=max_tokens),
+        ) as stream:
+            async for text in stream.text_stream:
+                parts.append(text)
+                if scanner.feed(text):
+                    break
+    except APITimeoutError:
+        _record_timeout()
+        raise
+    _record_latency(started, max_tokens=max_tokens)
+    raw = "".join(parts)
+    logger.debug("Claude streamed response: model={} chars={}", config.CLAUDE_MODEL, len(raw))
+    return raw
+
+
 _JSON_BLOCK_RE = re.compile(r'```(?:json)?\s*(\{.*?\})\s*```', re.DOTALL)
 
 
@@ -69,29 +272,50 @@ def _parse_json_response(raw: str) -> dict:
     """Extract JSON from LLM response, handling ```json blocks and trailing commentary."""
     stripped = raw.strip()
     try:
-        return json.loads(stripped)
-    except json.JSONDecodeError:
+        return json_fast.loads(stripped)
+    except json_fast.JSONDecodeError:
         pass
 
     m = _JSON_BLOCK_RE.search(stripped)
     if m:
-        return json.loads(m.group(1))
+        return json_fast.loads(m.group(1))
 
     start = stripped.find('{')
     end = stripped.rfind('}')
     if start != -1 and end > start:
-        return json.loads(stripped[start:end + 1])
+        return json_fast.loads(stripped[start:end + 1])
 
     raise ValueError("No JSON found in response")
 
 
-async def think(message: Message) -> BrainDecision:
-    """Main decision function for chat messages. NEVER includes channel link."""
-    if _client is None:
-        logger.warning("Claude client not initialized — skipping Brain")
-        return BrainDecision(should_respond=False, reason="no_client")
+def _parse_json_array(raw: str) -> list:
+    """Extract a JSON array from LLM response (batched decisions)."""
+    stripped = raw.strip()
+    start = stripped.find('[')
+    end = stripped.rfind(']')
+    if start == -1 or end <= start:
+        raise ValueError("No JSON array found in response")
+    data = json_fast.loads(stripped[start:end + 1])
+    if not isinstance(data, list):
+        raise ValueError("Expected JSON array")
+    return data
+
+
+# Inputs above this size are formatted/parsed in a worker thread so a burst
+# of long Telegram messages does not stall the event loop. Smaller ones stay
+# inline — a thread hop costs more than the work itself.
+OFFLOAD_THRESHOLD_CHARS = 1024
 
-    # Build context from recent messages
+
+async def _run_sized(size: int, fn, *args, **kwargs):
+    """Call fn inline for small inputs, via asyncio.to_thread for large ones."""
+    if size > OFFLOAD_THRESHOLD_CHARS:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+async def _build_context(message: Message) -> str:
+    """Format the last few messages of the chat as prompt context."""
     recent = await db.get_recent_messages(
         chat_id=message.chat_id, limit=5, before_id=message.id or 0
     )
@@ -99,37 +323,18 @@ async def think(message: Message) -> BrainDecision:
     for m in recent:
         short_text = m["text"][:150]
         context_lines.append(f"{m['sender_name']}: {short_text}")
-    context_str = "\n".join(context_lines) if context_lines else "(нет предыдущих сообщений)"
+    return "\n".join(context_lines) if context_lines else "(нет предыдущих сообщений)"
 
-    prompt_text = DECISION_PROMPT.format(
-        text=message.text,
-        sender=message.sender_name,
-        context=context_str,
-    )
-
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": prompt_text},
-    ]
-
-    try:
-        raw = await _call_llm(messages)
-    except Exception as e:
-        logger.error("Claude call failed: {}", e)
-        return BrainDecision(should_respond=False, reason=f"llm_error:{e}")
-
-    try:
-        data = _parse_json_response(raw)
-    except (json.JSONDecodeError, ValueError):
-        logger.warning("Brain returned non-JSON: {}", raw[:200])
-        return BrainDecision(should_respond=False, reason="parse_error")
 
+def _decision_from_data(data: dict) -> BrainDecision:
+    """Turn parsed LLM JSON into a BrainDecision (strips any channel link)."""
     should_respond = bool(data.get("should_respond", False))
     reason = str(data.get("reason", ""))
     response_text: Optional[str] = data.get("response") or None
 
     if not should_respond or not response_text:
-        return BrainDecision(
+        # Most common outcome; every field is already coerced above.
+        return BrainDecision.model_construct(
             should_respond=False,
             reason=reason,
             llm_model=config.CLAUDE_MODEL,
@@ -153,6 +358,170 @@ async def think(message: Message) -> BrainDecision:
     )
 
 
+async def think(message: Message) -> BrainDecision:
+    """Main decision function for chat messages. NEVER includes channel link."""
+    if _client is None:
+        logger.warning("Claude client not initialized — skipping Brain")
+        return BrainDecision(should_respond=False, reason="no_client")
+
+    cached = _decision_cache.get(message.chat_id, message.text)
+    if cached is not None:
+        logger.opt(lazy=True).debug("Brain cache hit (reason={}): {}",
+                                    lambda: cached.reason, lambda: message.text[:80])
+        return cached
+
+    prompt_text = await _run_sized(
+        len(message.text),
+        DECISION_PROMPT.format,
+        text=message.text,
+        sender=message.sender_name,
+        context=await _build_context(message),
+    )
+
+    try:
+        raw = await _stream_llm_json(_user_turn(prompt_text), system=DECISION_SYSTEM)
+    except Exception as e:
+        logger.error("Claude call failed: {}", e)
+        return BrainDecision(should_respond=False, reason=f"llm_error:{e}")
+
+    try:
+        data = await _run_sized(len(raw), _parse_json_response, raw)
+    except (json_fast.JSONDecodeError, ValueError):
+        logger.warning("Brain returned non-JSON: {}", raw[:200])
+        return BrainDecision(should_respond=False, reason="parse_error")
+
+    decision = _decision_from_data(data)
+    _decision_cache.put(message.chat_id, message.text, decision)
+    return decision
+
+
+# --- Micro-batching of concurrent think() calls ---
+# Messages arriving within BATCH_WINDOW_SEC of each other share one LLM
+# request (system prompt + instructions are sent once per batch).
+
+BATCH_WINDOW_SEC = 0.15
+BATCH_MAX_SIZE = 8
+_BATCH_MAX_TOKENS_PER_ITEM = 200
+
+_batch_queue: Optional[asyncio.Queue] = None
+_batch_worker: Optional[asyncio.Task] = None
+_flush_tasks: set[asyncio.Task] = set()  # keep strong refs to running flushes
+
+
+async def think_batched(message: Message) -> BrainDecision:
+    """Same contract as think(), but coalesces concurrent calls into one LLM request."""
+    global _batch_queue, _batch_worker
+    if _client is None:
+        logger.warning("Claude client not initialized — skipping Brain")
+        return BrainDecision(should_respond=False, reason="no_client")
+
+    if _batch_worker is None or _batch_worker.done():
+        _batch_queue = asyncio.Queue()
+        _batch_worker = asyncio.create_task(_batch_loop(_batch_queue))
+
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    await _batch_queue.put((message, future))
+    return await future
+
+
+async def _batch_loop(queue: asyncio.Queue) -> None:
+    """Collect queued messages for up to BATCH_WINDOW_SEC and flush them together."""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + BATCH_WINDOW_SEC
+        try:
+            while len(batch) < BATCH_MAX_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Shutdown while collecting: flush what was already taken off the queue
+            task = asyncio.create_task(_flush_batch(batch))
+            _flush_tasks.add(task)
+            task.add_done_callback(_flush_tasks.discard)
+            raise
+        task = asyncio.create_task(_flush_batch(batch))
+        _flush_tasks.add(task)
+        task.add_done_callback(_flush_tasks.discard)
+
+
+async def _flush_batch(batch: list[tuple[Message, asyncio.Future]]) -> None:
+    """Resolve every future in the batch; never leaves a caller hanging.
+
+    If the batch call fails (timeout, API error), each message gets its own
+    think() call instead of being declined unseen; whatever still raises is
+    passed on to that message's caller.
+    """
+    try:
+        if len(batch) == 1:
+            decisions = [await think(batch[0][0])]
+        else:
+            decisions = await _think_many([m for m, _ in batch])
+    except Exception as e:
+        logger.error("Batched Brain call failed, retrying one by one: {}", e)
+        decisions = await asyncio.gather(*(think(m) for m, _ in batch), return_exceptions=True)
+
+    for (_, future), decision in zip(batch, decisions):
+        if future.done():
+            continue
+        if isinstance(decision, BaseException):
+            future.set_exception(decision)
+        else:
+            future.set_result(decision)
+
+
+async def _think_many(messages: list[Message]) -> list[BrainDecision]:
+    """Decide for several messages; cached declines are answered without the LLM."""
+    decisions = [_decision_cache.get(m.chat_id, m.text) for m in messages]
+    todo = [m for m, d in zip(messages, decisions) if d is None]
+    if len(todo) == 1:
+        fresh = [await think(todo[0])]
+    elif todo:
+        fresh = await _think_uncached(todo)
+    else:
+        fresh = []
+    fresh_iter = iter(fresh)
+    return [d if d is not None else next(fresh_iter) for d in decisions]
+
+
+async def _think_uncached(messages: list[Message]) -> list[BrainDecision]:
+    """One LLM call for several messages. Falls back to per-message think() on bad output."""
+    contexts = await asyncio.gather(*(_build_context(m) for m in messages))
+    items = "\n\n".join(
+        f"--- id={i} ---\nЧат:\n{ctx}\n\n{m.sender_name}: \"{m.text}\""
+        for i, (m, ctx) in enumerate(zip(messages, contexts), 1)
+    )
+    raw = await _call_llm(
+        _user_turn(DECISION_BATCH_PROMPT.format(items=items)),
+        system=DECISION_SYSTEM,
+        max_tokens=_BATCH_MAX_TOKENS_PER_ITEM * len(messages),
+        latency_window="batch",
+    )
+    try:
+        rows = _parse_json_array(raw)
+        by_id = {int(r["id"]): r for r in rows if isinstance(r, dict) and "id" in r}
+    except (json_fast.JSONDecodeError, ValueError, TypeError, KeyError):
+        logger.warning("Batched Brain returned non-JSON, retrying one by one: {}", raw[:200])
+        return list(await asyncio.gather(*(think(m) for m in messages)))
+
+    logger.debug("Brain batch: {} messages in one call", len(messages))
+    decisions = []
+    for i, m in enumerate(messages, 1):
+        if i in by_id:
+            decision = _decision_from_data(by_id[i])
+            _decision_cache.put(m.chat_id, m.text, decision)
+        else:
+            decision = BrainDecision(should_respond=False, reason="missing_in_batch",
+                                     llm_model=config.CLAUDE_MODEL)
+        decisions.append(decision)
+    return decisions
+
+
 async def think_followup_dm(question: str, chat_response: str) -> Optional[str]:
     """Generate a follow-up DM to send after answering in chat.
 
@@ -166,13 +535,8 @@ async def think_followup_dm(question: str, chat_response: str) -> Optional[str]:
         chat_response=chat_response,
     )
 
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": prompt_text},
-    ]
-
     try:
-        raw = await _call_llm(messages)
+        raw = await _call_llm(_user_turn(prompt_text), system=CHAT_SYSTEM)
     except Exception as e:
         logger.error("Follow-up DM LLM failed: {}", e)
         return None
@@ -180,7 +544,7 @@ async def think_followup_dm(question: str, chat_response: str) -> Optional[str]:
     try:
         data = _parse_json_response(raw)
         dm_text = data.get("dm_text") or None
-    except (json.JSONDecodeError, ValueError):
+    except (json_fast.JSONDecodeError, ValueError):
         logger.warning("Follow-up DM non-JSON: {}", raw[:200])
         return None
 
@@ -206,13 +570,8 @@ async def think_dm(sender_name: str, text: str) -> tuple[Optional[str], str]:
         return None, "unknown"
 
     prompt_text = DM_RESPONSE_PROMPT.format(text=text)
-    messages = [
-        {"role": "system", "content": DM_SYSTEM_PROMPT},
-        {"role": "user", "content": prompt_text},
-    ]
-
     try:
-        raw = await _call_llm(messages)
+        raw = await _call_llm(_user_turn(prompt_text), system=DM_SYSTEM)
     except Exception as e:
         logger.error("DM Claude call failed: {}", e)
         return None, "unknown"
@@ -221,7 +580,7 @@ async def think_dm(sender_name: str, text: str) -> tuple[Optional[str], str]:
         data = _parse_json_response(raw)
         response_text = data.get("response") or None
         dm_type = data.get("dm_type", "unknown")
-    except (json.JSONDecodeError, ValueError):
+    except (json_fast.JSONDecodeError, ValueError):
         logger.warning("DM Brain returned non-JSON: {}", raw[:200])
         return None, "unknown"
 
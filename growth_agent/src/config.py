@@ -21,6 +21,9 @@ CHANNEL_LINK: str = os.getenv("CHANNEL_LINK", "@algora_trends")
 ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
 CLAUDE_MODEL: str = os.getenv("CLAUDE_MODEL", "claude-haiku-4-5-20251001")
 
+# --- Logging ---
+LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()  # DEBUG for per-message traces
+
 # --- PostgreSQL ---
 POSTGRES_DSN: str = os.getenv("POSTGRES_DSN", "")
 
@@ -3,6 +3,7 @@
 Uses asyncpg for async access. Connection pool is initialized once on startup.
 """
 
+import asyncio
 from datetime import datetime, date, timezone
 from typing import Optional
 
@@ -15,9 +16,14 @@ _pool: Optional[asyncpg.Pool] = None
 
 
 async def init_pool(dsn: str) -> None:
-    """Initialize connection pool. Call once at startup."""
+    """Initialize connection pool. Call once at startup.
+
+    asyncpg prepares every query on first use and keeps the plan in a
+    per-connection LRU keyed by the exact SQL text, so hot queries below are
+    plain string literals and the cache is sized to hold all of them.
+    """
     global _pool
-    _pool = await asyncpg.create_pool(dsn, min_size=2, max_size=10)
+    _pool = await asyncpg.create_pool(dsn, min_size=2, max_size=10, statement_cache_size=256)
     logger.info("DB pool initialized")
 
 
@@ -41,7 +47,7 @@ async def upsert_chat(chat: Chat) -> int:
     row = await pool.fetchrow("""
         INSERT INTO chats (telegram_id, title, topic, member_count, rules_summary,
                            our_status, joined_at, last_activity)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+        VALUES ($1, $2, $3, $4, $5, $6, COALESCE($7, NOW()), $8)
         ON CONFLICT (telegram_id) DO UPDATE SET
             title = EXCLUDED.title,
             member_count = EXCLUDED.member_count,
@@ -51,7 +57,7 @@ async def upsert_chat(chat: Chat) -> int:
     """,
         chat.telegram_id, chat.title, chat.topic, chat.member_count,
         chat.rules_summary, chat.our_status,
-        chat.joined_at or datetime.now(timezone.utc), chat.last_activity
+        chat.joined_at, chat.last_activity
     )
     return row["id"]
 
@@ -63,6 +69,14 @@ async def get_active_chats() -> list[dict]:
     return [dict(r) for r in rows]
 
 
+async def get_telegram_id(chat_id: int) -> Optional[int]:
+    """Return telegram_id for an internal chat id, or None if unknown or not joined."""
+    pool = _pool_or_raise()
+    return await pool.fetchval(
+        "SELECT telegram_id FROM chats WHERE id = $1 AND our_status = 'joined' LIMIT 1",
+        chat_id)
+
+
 async def update_chat_status(telegram_id: int, status: str) -> None:
     pool = _pool_or_raise()
     await pool.execute(
@@ -79,12 +93,12 @@ async def save_message(msg: Message) -> int:
     row = await pool.fetchrow("""
         INSERT INTO messages (chat_id, telegram_message_id, sender_name, text,
                               is_relevant, relevance_score, created_at)
-        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        VALUES ($1, $2, $3, $4, $5, $6, COALESCE($7, NOW()))
         ON CONFLICT DO NOTHING
         RETURNING id
     """,
         msg.chat_id, msg.telegram_message_id, msg.sender_name, msg.text,
-        msg.is_relevant, msg.relevance_score, msg.created_at or datetime.now(timezone.utc)
+        msg.is_relevant, msg.relevance_score, msg.created_at
     )
     return row["id"] if row else 0
 
@@ -121,15 +135,155 @@ async def save_response(resp: Response) -> int:
     row = await pool.fetchrow("""
         INSERT INTO responses (message_id, chat_id, response_text, included_channel_link,
                                llm_model, llm_cost, sent_at, reaction)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+        VALUES ($1, $2, $3, $4, $5, $6, COALESCE($7, NOW()), $8)
         RETURNING id
     """,
         resp.message_id, resp.chat_id, resp.response_text, resp.included_channel_link,
-        resp.llm_model, resp.llm_cost, resp.sent_at or datetime.now(timezone.utc), resp.reaction
+        resp.llm_model, resp.llm_cost, resp.sent_at, resp.reaction
     )
     return row["id"]
 
 
+# --- WRITE-BEHIND ---
+# Sent replies and non-relevant incoming messages are written by background
+# tasks in small batches (executemany) instead of one round-trip per event.
+
+WRITE_BATCH_MAX = 64
+WRITE_FLUSH_SEC = 0.5
+MESSAGE_QUEUE_MAX = 1000
+
+
+class _BatchWriter:
+    """Drains a queue in a background task and hands batches to ``flush``."""
+
+    def __init__(self, name: str, flush, max_batch: int, flush_sec: float, maxsize: int = 0):
+        self._name = name
+        self._flush = flush
+        self._max_batch = max_batch
+        self._flush_sec = flush_sec
+        self._maxsize = maxsize
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self._maxsize)
+        self._task = asyncio.create_task(self._run(self._queue))
+
+    def put(self, item) -> bool:
+        """Queue an item. False if the writer is not running or is full."""
+        if self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def stop(self) -> None:
+        """Flush anything still queued and stop."""
+        if self._task is None:
+            return
+        queue, self._queue = self._queue, None
+        await queue.put(None)  # sentinel: flush and exit
+        await self._task
+        self._task = None
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self._flush_sec
+            while len(batch) < self._max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error("Failed to write {} {}: {}", len(batch), self._name, e)
+
+
+async def _flush_responses(batch: list[Response]) -> None:
+    pool = _pool_or_raise()
+    await pool.executemany("""
+        INSERT INTO responses (message_id, chat_id, response_text, included_channel_link,
+                               llm_model, llm_cost, sent_at, reaction)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+    """, [
+        (r.message_id, r.chat_id, r.response_text, r.included_channel_link,
+         r.llm_model, r.llm_cost, r.sent_at, r.reaction)
+        for r in batch
+    ])
+
+
+async def _flush_messages(batch: list[Message]) -> None:
+    pool = _pool_or_raise()
+    await pool.executemany("""
+        INSERT INTO messages (chat_id, telegram_message_id, sender_name, text,
+                              is_relevant, relevance_score, created_at)
+        VALUES ($1, $2, $3, $4, $5, $6, COALESCE($7, NOW()))
+        ON CONFLICT DO NOTHING
+    """, [
+        (m.chat_id, m.telegram_message_id, m.sender_name, m.text,
+         m.is_relevant, m.relevance_score, m.created_at)
+        for m in batch
+    ])
+
+
+_response_writer = _BatchWriter("responses", _flush_responses, WRITE_BATCH_MAX, WRITE_FLUSH_SEC)
+_message_writer = _BatchWriter(
+    "messages", _flush_messages, WRITE_BATCH_MAX, WRITE_FLUSH_SEC, maxsize=MESSAGE_QUEUE_MAX)
+
+
+def start_writer() -> None:
+    """Start the background writers. Call once after init_pool()."""
+    _response_writer.start()
+    _message_writer.start()
+
+
+async def stop_writer() -> None:
+    """Flush anything still queued and stop the writers."""
+    await _response_writer.stop()
+    await _message_writer.stop()
+
+
+async def record_response(resp: Response) -> None:
+    """Log a sent response and bump the chat's daily counter.
+
+    The schedule counters are updated right away: is_chat_allowed reads them
+    to enforce the daily limit and reply interval, so they must never lag
+    behind a send. Only the responses log row is queued for the background
+    writer (written immediately if it is not running).
+    """
+    if resp.sent_at is None:
+        resp.sent_at = datetime.now(timezone.utc)
+    await increment_messages_today(resp.chat_id)
+    if not _response_writer.put(resp):
+        await _flush_responses([resp])
+
+
+async def enqueue_message(msg: Message) -> None:
+    """Save an incoming message whose DB id is not needed (non-relevant traffic).
+
+    Batched by the background writer; written immediately if the writer is
+    not running or its queue is full. Use save_message() when the id matters.
+    """
+    if not _message_writer.put(msg):
+        await _flush_messages([msg])
+
+
 async def count_responses_today(chat_id: int) -> int:
     """Count responses sent to this chat today."""
     pool = _pool_or_raise()
@@ -382,19 +536,35 @@ async def get_agent_stats(days: int = 30) -> dict:
 
 
 async def is_chat_allowed(chat_id: int) -> bool:
-    """Check if we can send to this chat right now."""
+    """Check if we can send to this chat right now.
+
+    One round-trip: creates the default schedule row if missing and
+    evaluates the limits server-side. The CTE's INSERT result is unioned
+    with the plain SELECT because both run on the same snapshot.
+    """
     from . import config
 
-    sched = await get_or_create_schedule(chat_id)
-    if not sched["is_active"]:
-        return False
-    if sched["cooldown_until"] and sched["cooldown_until"] > datetime.now(timezone.utc):
-        return False
-    if sched["messages_today"] >= sched["max_messages_per_day"]:
-        return False
-    # Enforce minimum interval between replies in the same chat
-    if sched["last_message_at"]:
-        elapsed = (datetime.now(timezone.utc) - sched["last_message_at"]).total_seconds()
-        if elapsed < config.MIN_INTERVAL_BETWEEN_REPLIES_SEC:
-            return False
-    return True
+    pool = _pool_or_raise()
+    allowed = await pool.fetchval("""
+        WITH ins AS (
+            INSERT INTO schedule (chat_id) VALUES ($1)
+            ON CONFLICT (chat_id) DO NOTHING
+            RETURNING is_active, cooldown_until, messages_today,
+                      max_messages_per_day, last_message_at
+        ), sched AS (
+            SELECT * FROM ins
+            UNION ALL
+            SELECT is_active, cooldown_until, messages_today,
+                   max_messages_per_day, last_message_at
+            FROM schedule WHERE chat_id = $1
+        )
+        SELECT COALESCE(is_active, false)
+           AND (cooldown_until IS NULL OR cooldown_until <= NOW())
+           AND COALESCE(messages_today, 0) < COALESCE(max_messages_per_day, 0)
+           -- minimum interval between replies in the same chat
+           AND (last_message_at IS NULL
+                OR last_message_at <= NOW() - make_interval(secs => $2))
+        FROM sched
+        LIMIT 1
+    """, chat_id, float(config.MIN_INTERVAL_BETWEEN_REPLIES_SEC))
+    return bool(allowed)
@@ -0,0 +1,25 @@
+"""Fast JSON helpers: orjson when installed, stdlib json otherwise."""
+
+try:
+    import orjson
+
+    JSONDecodeError = orjson.JSONDecodeError
+
+    def loads(data: str | bytes):
+        return orjson.loads(data)
+
+    def dumps_bytes(obj) -> bytes:
+        """Serialize to UTF-8 bytes (non-ASCII kept as-is)."""
+        return orjson.dumps(obj)
+
+except ImportError:
+    import json
+
+    JSONDecodeError = json.JSONDecodeError
+
+    def loads(data: str | bytes):
+        return json.loads(data)
+
+    def dumps_bytes(obj) -> bytes:
+        """Serialize to UTF-8 bytes (non-ASCII kept as-is)."""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
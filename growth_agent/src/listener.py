@@ -8,7 +8,6 @@ newly joined chats (via sync_chats.py) are picked up without restart.
 """
 
 import asyncio
-from datetime import datetime, timezone
 from typing import Callable, Awaitable
 
 from loguru import logger
@@ -37,8 +36,7 @@ class Listener:
         self._callback = on_relevant_message
         self._dm_callback = on_dm_message
         self._client: TelegramClient | None = None
-        self._chat_ids: set[int] = set()  # telegram_id of monitored chats
-        self._chat_map: dict[int, int] = {}  # telegram_id -> internal DB id
+        self._chat_map: dict[int, int] = {}  # telegram_id -> internal DB id (monitored chats)
         self._refresh_task: asyncio.Task | None = None
 
     async def start(self) -> None:
@@ -58,9 +56,8 @@ class Listener:
     async def _refresh_chat_list(self) -> None:
         """Reload active chats from DB."""
         chats = await db.get_active_chats()
-        self._chat_ids = {c["telegram_id"] for c in chats}
         self._chat_map = {c["telegram_id"]: c["id"] for c in chats}
-        logger.info("Monitoring {} chats", len(self._chat_ids))
+        logger.info("Monitoring {} chats", len(self._chat_map))
 
     async def _periodic_refresh(self) -> None:
         """Refresh chat list every CHAT_REFRESH_INTERVAL seconds."""
@@ -92,9 +89,10 @@ class Listener:
         async def handler(event: events.NewMessage.Event):
             msg: TgMessage = event.message
 
-            # Only process chats we monitor
+            # Only process chats we monitor (map is refreshed in the background)
             chat_id_tg = event.chat_id
-            if chat_id_tg not in self._chat_ids:
+            internal_chat_id = self._chat_map.get(chat_id_tg)
+            if not internal_chat_id:
                 return
 
             text = msg.message or ""
@@ -104,35 +102,37 @@ class Listener:
             score = _compute_relevance(text)
             is_relevant = score >= config.MIN_RELEVANCE_SCORE
 
-            internal_chat_id = self._chat_map.get(chat_id_tg)
-            if not internal_chat_id:
-                return
-
             sender = await event.get_sender()
             sender_name = getattr(sender, "username", None) or getattr(sender, "first_name", "unknown")
 
-            message = Message(
+            # Fields come straight from Telethon with the right types already;
+            # skip pydantic validation on this per-event path.
+            message = Message.model_construct(
                 chat_id=internal_chat_id,
                 telegram_message_id=msg.id,
                 sender_name=str(sender_name),
                 text=text,
                 is_relevant=is_relevant,
                 relevance_score=score,
-                created_at=datetime.now(timezone.utc),
+                created_at=msg.date,  # Telegram send time (tz-aware UTC)
             )
 
+            if not is_relevant:
+                # No id needed downstream — batched by the background writer
+                await db.enqueue_message(message)
+                return
+
             saved_id = await db.save_message(message)
             if saved_id == 0:
                 return  # duplicate, skip
 
             message.id = saved_id
 
-            if is_relevant:
-                logger.debug(
-                    "Relevant message (score={:.2f}) in chat {} from {}: {}",
-                    score, chat_id_tg, sender_name, text[:80]
-                )
-                await self._callback(message)
+            logger.opt(lazy=True).debug(
+                "Relevant message (score={:.2f}) in chat {} from {}: {}",
+                lambda: score, lambda: chat_id_tg, lambda: sender_name, lambda: text[:80]
+            )
+            await self._callback(message)
 
     async def run_until_disconnected(self) -> None:
         assert self._client is not None
@@ -1,13 +1,93 @@
-"""Relevance scoring for incoming messages."""
+"""Relevance scoring for incoming messages.
+
+Keywords are compiled once at import into an Aho-Corasick automaton
+(pyahocorasick), so a message is scanned in a single pass regardless of
+how many keywords are configured. Without pyahocorasick, a compiled
+regex alternation rejects keyword-free messages (most chat noise) before
+the per-keyword substring checks run.
+"""
+
+import re
+from bisect import bisect_right
+from itertools import accumulate
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 from . import config
 
+# Distinct keyword hits at which the score saturates at 1.0.
+SATURATION_HITS = 3
+
+# Lowercased, de-duplicated keywords (order preserved).
+_KEYWORDS: tuple[str, ...] = tuple(dict.fromkeys(
+    kw.lower() for kw in config.RELEVANCE_KEYWORDS if kw
+))
+
+
+def _build_automaton(keywords: tuple[str, ...]):
+    """Compile keywords into an Aho-Corasick automaton (value = keyword index)."""
+    if ahocorasick is None or not keywords:
+        return None
+    automaton = ahocorasick.Automaton()
+    for idx, kw in enumerate(keywords):
+        automaton.add_word(kw, idx)
+    automaton.make_automaton()
+    return automaton
+
+
+_AC = _build_automaton(_KEYWORDS)
+_MIN_KEYWORD_LEN = min(map(len, _KEYWORDS), default=0)
+
+# "Any keyword at all?" gate for the fallback path.
+_GATE = re.compile("|".join(map(re.escape, _KEYWORDS))) if _AC is None and _KEYWORDS else None
+
+
+def _count_hits(text_lower: str) -> int:
+    """Distinct keywords in already-lowercased text, capped at SATURATION_HITS."""
+    if _AC is None:
+        if _GATE is None or not _GATE.search(text_lower):
+            return 0
+        hits = 0
+        for kw in _KEYWORDS:
+            if kw in text_lower:
+                hits += 1
+                if hits >= SATURATION_HITS:
+                    break
+        return hits
+    seen: set[int] = set()
+    for _, idx in _AC.iter(text_lower):
+        seen.add(idx)
+        if len(seen) >= SATURATION_HITS:
+            break
+    return len(seen)
+
 
 def compute_relevance(text: str) -> float:
     """Simple keyword-based relevance score (0.0 – 1.0)."""
-    if not text:
+    if not text or len(text) < _MIN_KEYWORD_LEN or not _KEYWORDS:
         return 0.0
-    text_lower = text.lower()
-    hits = sum(1 for kw in config.RELEVANCE_KEYWORDS if kw in text_lower)
+    hits = _count_hits(text.lower())
     # Normalize: 3+ hits → 1.0
-    return min(hits / 3.0, 1.0)
+    return min(hits / SATURATION_HITS, 1.0)
+
+
+def compute_relevance_batch(texts: list[str]) -> list[float]:
+    """Score several messages at once (backfill / replay).
+
+    With the automaton, all texts are joined with NUL and scanned in one
+    pass; hits are bucketed back to their text by offset. Keywords never
+    contain NUL, so a match cannot span two texts.
+    """
+    if _AC is None or not texts:
+        return [compute_relevance(t) for t in texts]
+
+    lowered = [t.lower() if t else "" for t in texts]
+    # Each text's end offset in the joined string (lowering can change length)
+    ends = list(accumulate(len(t) + 1 for t in lowered))
+    hits: list[set[int]] = [set() for _ in lowered]
+    for end_idx, kw_idx in _AC.iter("\x00".join(lowered)):
+        hits[bisect_right(ends, end_idx)].add(kw_idx)
+    return [min(len(h) / SATURATION_HITS, 1.0) for h in hits]
@@ -5,7 +5,8 @@
 """
 
 import asyncio
-from datetime import datetime, date, time, timedelta, timezone
+import time
+from datetime import date
 
 from loguru import logger
 
@@ -13,14 +14,17 @@ from . import db, config
 from .models import Metrics
 
 
-async def _wait_until(target: time) -> None:
-    """Sleep until next occurrence of target UTC time."""
-    now = datetime.now(timezone.utc)
-    target_dt = datetime.combine(now.date(), target, tzinfo=timezone.utc)
-    if target_dt <= now:
-        target_dt += timedelta(days=1)
-    wait_sec = (target_dt - now).total_seconds()
-    logger.info("Scheduler: next task at {} UTC ({:.0f}s)", target_dt, wait_sec)
+_DAY_SEC = 86400
+
+
+async def _wait_until(utc_sec_of_day: int) -> None:
+    """Sleep until next occurrence of the given second of the UTC day.
+
+    Unix time has no leap seconds, so epoch % 86400 is the UTC time of day.
+    """
+    wait_sec = (utc_sec_of_day - time.time()) % _DAY_SEC or _DAY_SEC
+    logger.info("Scheduler: next task at {:02d}:{:02d} UTC ({:.0f}s)",
+                utc_sec_of_day // 3600, utc_sec_of_day % 3600 // 60, wait_sec)
     await asyncio.sleep(wait_sec)
 
 
@@ -77,13 +81,13 @@ async def _collect_daily_metrics() -> None:
 
 async def run_daily_tasks() -> None:
     """Background coroutine: runs daily maintenance at 00:00 UTC."""
-    RESET_AT = time(0, 0, 0)
-    METRICS_AT = time(0, 5, 0)
+    RESET_AT = 0            # 00:00 UTC, seconds into the day
+    METRICS_DELAY_SEC = 300  # metrics at 00:05 UTC
     while True:
         await _wait_until(RESET_AT)
         logger.info("Running daily maintenance...")
         await db.reset_daily_counters()
 
         # Wait 5 more minutes, then collect metrics
-        await asyncio.sleep(300)
+        await asyncio.sleep(METRICS_DELAY_SEC)
         await _collect_daily_metrics()
@@ -0,0 +1,109 @@
+"""Near-duplicate decision cache for Brain.
+
+Chats repeat the same off-topic or too-generic questions ("как начать на вб?")
+in slightly different words. Brain declines those anyway, so a decline for a
+near-identical text can be reused instead of paying for another LLM call.
+
+Entries are per chat: a decline often depends on the chat (off-topic here,
+already answered there), so it is only reused for the same chat_id. Lookup
+is an exact match on the stemmed word set first; the Jaccard near-match
+scan only runs over that chat's own entries.
+
+Similarity is Jaccard overlap of crudely stemmed word sets — cheap, no model
+to load, and good enough for short chat messages. Only declines are cached:
+a positive decision carries reply text, and posting the same reply in several
+chats is exactly what gets the account banned.
+"""
+
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .models import BrainDecision
+
+SIMILARITY_THRESHOLD = 0.8
+CACHE_TTL_SEC = 6 * 3600
+CACHE_MAX_ENTRIES = 512
+_STEM_LEN = 5      # "поставщика" / "поставщиков" → "поста"
+_MIN_TOKENS = 3    # too short to judge similarity reliably
+
+_WORD_RE = re.compile(r"\w{3,}")
+
+_Key = tuple[int, frozenset[str]]
+
+
+def _signature(text: str) -> frozenset[str]:
+    return frozenset(w[:_STEM_LEN] for w in _WORD_RE.findall(text.lower()))
+
+
+class DecisionCache:
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        ttl_sec: float = CACHE_TTL_SEC,
+        max_entries: int = CACHE_MAX_ENTRIES,
+    ):
+        self._threshold = threshold
+        self._ttl = ttl_sec
+        self._max = max_entries
+        # (chat_id, signature) -> (decision, stored_at); oldest first
+        self._entries: OrderedDict[_Key, tuple[BrainDecision, float]] = OrderedDict()
+        # chat_id -> signatures stored for it (near-match candidates)
+        self._by_chat: dict[int, set[frozenset[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chat_id: int, text: str) -> Optional[BrainDecision]:
+        """Return a cached decline for a near-identical text in the same chat, if any."""
+        sig = _signature(text)
+        if len(sig) < _MIN_TOKENS:
+            return None
+        self._expire()
+
+        entry = self._entries.get((chat_id, sig))
+        if entry is None:
+            best_sig, best_score = None, 0.0
+            for other in self._by_chat.get(chat_id, ()):
+                union = len(sig | other)
+                score = len(sig & other) / union if union else 0.0
+                if score > best_score:
+                    best_sig, best_score = other, score
+            if best_sig is not None and best_score >= self._threshold:
+                entry = self._entries[(chat_id, best_sig)]
+
+        if entry is not None:
+            self.hits += 1
+            return entry[0].model_copy()
+        self.misses += 1
+        return None
+
+    def put(self, chat_id: int, text: str, decision: BrainDecision) -> None:
+        """Remember a decision for this chat; anything but a decline is ignored."""
+        if decision.should_respond:
+            return
+        sig = _signature(text)
+        if len(sig) < _MIN_TOKENS:
+            return
+        key = (chat_id, sig)
+        self._entries[key] = (decision, time.monotonic())
+        self._entries.move_to_end(key)
+        self._by_chat.setdefault(chat_id, set()).add(sig)
+        while len(self._entries) > self._max:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: _Key) -> None:
+        del self._entries[key]
+        chat_id, sig = key
+        sigs = self._by_chat[chat_id]
+        sigs.discard(sig)
+        if not sigs:
+            del self._by_chat[chat_id]
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self._ttl
+        while self._entries:
+            key, (_, stored_at) = next(iter(self._entries.items()))
+            if stored_at >= cutoff:
+                break
+            self._drop(key)
@@ -0,0 +1,136 @@
+"""Shared resize/paste/save pipeline for the Telegram avatar scripts.
+
+Used by:
+    scripts/adapt_logo_for_telegram.py  — square logo, full size
+    scripts/adapt_circle_logo.py        — circular logo, 5% safety margin
+
+Telegram requirements:
+- Size: 640x640 pixels (square)
+- Format: PNG or JPG
+- File size: ideally under 200KB
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from PIL import Image
+
+ASSETS_DIR = Path(__file__).parent.parent / "assets"
+OUTPUT_PATH = ASSETS_DIR / "avatar_640.png"
+
+TARGET_SIZE = 640
+LIGHT_BG = (240, 240, 245)  # Light gray-blue
+MAX_AVATAR_KB = 200
+
+
+def _stamp_path(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + ".stamp")
+
+
+def _source_key(input_path: Path, target: int, margin: float, bg: tuple[int, int, int]) -> str:
+    """Hash of the source bytes plus the settings that shape the output.
+
+    Both avatar scripts write the same file from different sources, so an
+    mtime comparison alone would mistake one script's output for the other's.
+    """
+    h = hashlib.blake2b(input_path.read_bytes(), digest_size=16)
+    h.update(f"{target}|{margin}|{bg}".encode())
+    return h.hexdigest()
+
+
+def adapt(
+    input_path: Path,
+    output_path: Path = OUTPUT_PATH,
+    *,
+    target: int = TARGET_SIZE,
+    margin: float = 1.0,
+    bg: tuple[int, int, int] = LIGHT_BG,
+) -> bool:
+    """Fit the logo into a target x target square on a solid background.
+
+    margin is the share of the square the logo may use (0.95 leaves a 5%
+    border so a circular crop cuts nothing off).
+    """
+    print(f"Reading logo from: {input_path}")
+
+    # One stat serves both the existence check and the size report
+    try:
+        source_kb = input_path.stat().st_size / 1024
+    except FileNotFoundError:
+        print(f"[ERROR] File not found: {input_path}")
+        return False
+
+    # Skip decode/resize/encode when the output was built from this exact source
+    key = _source_key(input_path, target, margin, bg)
+    stamp = _stamp_path(output_path)
+    try:
+        cached = stamp.read_text().strip() == key and output_path.exists()
+    except FileNotFoundError:
+        cached = False
+    if cached:
+        print(f"[OK] Avatar up to date (cached): {output_path}")
+        return True
+
+    # Open original image
+    img = Image.open(input_path)
+    print(f"Original size: {img.size}, mode: {img.mode}, file size: {source_kb:.1f} KB")
+
+    # Let the decoder downscale while loading (JPEG: 1/2..1/8, never below
+    # target; no-op for PNG) so LANCZOS works on fewer pixels
+    img.draft(None, (target, target))
+
+    # Palette / grayscale / CMYK sources → RGBA (keeps any transparency)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA")
+
+    # Get dimensions (draft may have reduced them)
+    width, height = img.size
+
+    # Scale to fit while keeping the aspect ratio
+    scale = min(target / width, target / height) * margin
+    new_width = int(width * scale)
+    new_height = int(height * scale)
+
+    if margin < 1.0:
+        print(f"Resizing to: {new_width}x{new_height} (with {round((1 - margin) * 100)}% safety margin)")
+
+    # Resize logo with high-quality resampling. Downscaling happens in place
+    # (the full-size buffer is released right away); reducing_gap=3.0 lets
+    # Pillow box-reduce first when shrinking by more than 3x, then LANCZOS.
+    # thumbnail() never enlarges, so small sources still go through resize().
+    if new_width < width:
+        img.thumbnail((new_width, new_height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+    else:
+        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    new_width, new_height = img.size  # thumbnail may round by a pixel
+
+    # Create square canvas with light background
+    canvas = Image.new("RGB", (target, target), bg)
+
+    # Center the logo on canvas
+    x_offset = (target - new_width) // 2
+    y_offset = (target - new_height) // 2
+
+    # Canvas is already bg — transparent logos composite straight onto it
+    if img.mode == "RGBA":
+        canvas.paste(img, (x_offset, y_offset), img)  # alpha as mask
+    else:
+        canvas.paste(img, (x_offset, y_offset))
+
+    # Fast zlib level: a 640x640 avatar is small either way, encode time dominates
+    # (PNG ignores quality=; scripts/optimize_assets.py shrinks release artifacts)
+    canvas.save(output_path, "PNG", compress_level=1)
+    stamp.write_text(key)
+
+    # Check file size
+    file_size_kb = output_path.stat().st_size / 1024
+    print(f"\n[OK] Avatar saved to: {output_path}")
+    print(f"Size: {target}x{target} pixels")
+    print(f"File size: {file_size_kb:.1f} KB (compressed from {source_kb:.1f} KB)")
+
+    if file_size_kb > MAX_AVATAR_KB:
+        print(f"[WARNING] File size is large ({file_size_kb:.1f} KB). Consider further optimization.")
+
+    return True
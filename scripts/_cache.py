@@ -0,0 +1,85 @@
+"""SQLite cache of Telegram search results for chat_discovery.py.
+
+A search run costs dozens of MTProto requests with rate-limit pauses, while
+its results change slowly. Rows younger than max_age_hours are reused
+instead of searching the segment again, but only by a run with the same
+search parameters (see search_key): a run capped by --max-candidates or
+skipping a different set of usernames saves a different result set.
+
+Stored in data/chat_discovery_cache.db (one connection per process, WAL).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+CACHE_PATH = Path(__file__).parent.parent / "data" / "chat_discovery_cache.db"
+DEFAULT_MAX_AGE_HOURS = 24
+
+_conn: sqlite3.Connection | None = None
+
+
+def _connect() -> sqlite3.Connection:
+    """Open (once) the cache database and create the table if needed."""
+    global _conn
+    if _conn is None:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(str(CACHE_PATH))
+        _conn.row_factory = sqlite3.Row
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS chats (
+                username TEXT NOT NULL,
+                segment TEXT NOT NULL,
+                title TEXT NOT NULL,
+                members INTEGER NOT NULL,
+                score REAL NOT NULL,
+                notes TEXT NOT NULL DEFAULT '',
+                ts REAL NOT NULL,
+                params TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (username, segment)
+            )
+        """)
+        # Migrate: caches written before search parameters were recorded
+        try:
+            _conn.execute("ALTER TABLE chats ADD COLUMN params TEXT NOT NULL DEFAULT ''")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+    return _conn
+
+
+def search_key(max_candidates: Optional[int], seen: Iterable[str]) -> str:
+    """Identify the search parameters a result set was produced with."""
+    digest = hashlib.sha1("\n".join(sorted(seen)).encode("utf-8")).hexdigest()[:16]
+    return f"max={max_candidates or 0};seen={digest}"
+
+
+def load_chats(
+    segment: str, params: str, max_age_hours: float = DEFAULT_MAX_AGE_HOURS
+) -> list[sqlite3.Row]:
+    """Cached rows for a segment and search_key() newer than max_age_hours, best score first."""
+    cutoff = time.time() - max_age_hours * 3600
+    return _connect().execute(
+        "SELECT username, title, members, score, notes, ts FROM chats"
+        " WHERE segment = ? AND params = ? AND ts > ? ORDER BY score DESC",
+        (segment, params, cutoff),
+    ).fetchall()
+
+
+def save_chats(segment: str, params: str, chats: Iterable) -> None:
+    """Replace the segment's rows with chats (objects with username/title/members/relevance_score/notes)."""
+    now = time.time()
+    conn = _connect()
+    with conn:
+        # A new search supersedes the previous one, whatever its parameters
+        conn.execute("DELETE FROM chats WHERE segment = ?", (segment,))
+        conn.executemany(
+            "INSERT INTO chats (username, segment, title, members, score, notes, ts, params)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(c.username, segment, c.title, c.members, c.relevance_score, c.notes, now, params)
+             for c in chats],
+        )
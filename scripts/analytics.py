@@ -5,15 +5,16 @@ Usage:
     python -X utf8 -m scripts.analytics --save               # save daily snapshot
     python -X utf8 -m scripts.analytics --report             # full weekly report
     python -X utf8 -m scripts.analytics --update-engagement  # fetch real views/likes
+    python -X utf8 -m scripts.analytics --no-engagement      # skip views/reactions sections
 """
 
 from __future__ import annotations
 
 import argparse
 import asyncio
-import json
 import os
 import sys
+from itertools import pairwise
 from pathlib import Path
 
 os.environ.setdefault("PYTHONIOENCODING", "utf-8")
@@ -22,6 +23,7 @@ if sys.stdout and sys.stdout.encoding != "utf-8":
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import httpx
 from loguru import logger
 
 from src.db import (
@@ -29,14 +31,11 @@ from src.db import (
     get_channel_stats_history,
     get_published_posts_count,
     get_top_products,
-    get_posts_by_type,
-    get_posts_by_category,
+    get_report_aggregates,
     save_channel_stats,
     get_posts_for_engagement_update,
-    update_post_engagement,
+    update_post_engagement_many,
     get_engagement_summary,
-    get_engagement_by_post_type,
-    get_engagement_by_category,
     get_top_posts_by_views,
 )
 from src.engagement import fetch_telegram_views, fetch_vk_engagement
@@ -47,6 +46,16 @@ from src.publish.telegram_bot import get_channel_info
 # Engagement update
 # ---------------------------------------------------------------------------
 
+# Per-platform concurrency; each request holds its slot for at least the
+# given interval, so throughput stays under slots/interval requests per second
+# (VK API allows 3 req/s per token; Telegram is a scraped public widget with no
+# published limit, so it stays at 2 in flight).
+_FETCH_LIMITS = {
+    "telegram": (2, 0.5),
+    "vk": (3, 1.0),
+}
+
+
 async def update_engagement() -> None:
     """Fetch real engagement metrics for all tracked posts."""
     init_db()
@@ -57,45 +66,54 @@ async def update_engagement() -> None:
         return
 
     logger.info("Updating engagement for {} posts...", len(posts))
-    updated = 0
+    slots = {platform: asyncio.Semaphore(n) for platform, (n, _) in _FETCH_LIMITS.items()}
+    # (message_id, platform, views, forwards, reactions), written in one transaction
+    rows: list[tuple[int, str, int, int, int]] = []
 
-    for post in posts:
+    async def fetch(post: dict) -> bool:
         msg_id = post["message_id"]
         platform = post["platform"]
+        if platform not in slots:
+            return False
+
+        async with slots[platform]:
+            _, min_interval = _FETCH_LIMITS[platform]
+            started = asyncio.get_running_loop().time()
+            if platform == "telegram":
+                data = await fetch_telegram_views(client, msg_id)
+            else:
+                data = await fetch_vk_engagement(client, msg_id)
+            # Rate limiting: keep the slot until the interval has passed
+            elapsed = asyncio.get_running_loop().time() - started
+            if elapsed < min_interval:
+                await asyncio.sleep(min_interval - elapsed)
+
+        if not data:
+            return False
 
         if platform == "telegram":
-            data = await fetch_telegram_views(msg_id)
-            if data:
-                update_post_engagement(
-                    message_id=msg_id,
-                    platform="telegram",
-                    views=data.get("views", 0),
-                )
-                old_views = post["views"]
-                new_views = data["views"]
-                if new_views != old_views:
-                    logger.info("  TG msg={}: {} → {} views", msg_id, old_views, new_views)
-                updated += 1
-
-        elif platform == "vk":
-            data = await fetch_vk_engagement(msg_id)
-            if data:
-                update_post_engagement(
-                    message_id=msg_id,
-                    platform="vk",
-                    views=data.get("views", 0),
-                    forwards=data.get("reposts", 0),
-                    reactions=data.get("likes", 0),
-                )
-                updated += 1
-                logger.info(
-                    "  VK post={}: {} views, {} likes, {} reposts",
-                    msg_id, data.get("views", 0),
-                    data.get("likes", 0), data.get("reposts", 0),
-                )
-
-        # Rate limiting: small delay between requests
-        await asyncio.sleep(0.5)
+            rows.append((msg_id, "telegram", data.get("views", 0), 0, 0))
+            old_views = post["views"]
+            new_views = data["views"]
+            if new_views != old_views:
+                logger.info("  TG msg={}: {} → {} views", msg_id, old_views, new_views)
+        else:
+            rows.append((
+                msg_id, "vk",
+                data.get("views", 0), data.get("reposts", 0), data.get("likes", 0),
+            ))
+            logger.info(
+                "  VK post={}: {} views, {} likes, {} reposts",
+                msg_id, data.get("views", 0),
+                data.get("likes", 0), data.get("reposts", 0),
+            )
+        return True
+
+    # One client (and connection pool) for every fetch instead of one per post
+    async with httpx.AsyncClient(timeout=10) as client:
+        results = await asyncio.gather(*(fetch(post) for post in posts))
+    updated = sum(results)
+    update_post_engagement_many(rows)
 
     logger.info("Engagement updated for {}/{} posts", updated, len(posts))
 
@@ -113,50 +131,54 @@ TYPE_LABELS = {
 }
 
 
-async def show_analytics(save_snapshot: bool = False) -> None:
+async def show_analytics(save_snapshot: bool = False, engagement: bool = True) -> None:
     init_db()
+    # Collect the report and write it to stdout once at the end
+    lines: list[str] = []
+    out = lines.append
 
-    print("\n" + "=" * 50)
-    print("  ALGORA ANALYTICS")
-    print("=" * 50)
+    out("\n" + "=" * 50)
+    out("  ALGORA ANALYTICS")
+    out("=" * 50)
 
     # Channel stats
     info = await get_channel_info()
     subscribers = info.get("subscribers", 0)
     posts_count = get_published_posts_count()
 
-    print(f"\n  Канал: @algora_trends")
-    print(f"  Подписчиков: {subscribers}")
-    print(f"  Постов опубликовано: {posts_count}")
+    out(f"\n  Канал: @algora_trends")
+    out(f"  Подписчиков: {subscribers}")
+    out(f"  Постов опубликовано: {posts_count}")
 
     # Save snapshot if requested
     if save_snapshot and subscribers > 0:
         save_channel_stats(subscribers, posts_count)
-        print("  Снимок статистики сохранён")
+        out("  Снимок статистики сохранён")
 
     # Engagement summary
-    eng = get_engagement_summary()
+    eng = get_engagement_summary() if engagement else None
     if eng and eng.get("total_views"):
-        print(f"\n  --- Вовлечённость ---")
-        print(f"  Всего просмотров: {eng['total_views']:,}")
-        print(f"  Средние просмотры: {eng['avg_views']:.0f}/пост")
-        print(f"  Макс просмотры: {eng['max_views']}")
+        out(f"\n  --- Вовлечённость ---")
+        out(f"  Всего просмотров: {eng['total_views']:,}")
+        out(f"  Средние просмотры: {eng['avg_views']:.0f}/пост")
+        out(f"  Макс просмотры: {eng['max_views']}")
         if eng.get("total_forwards"):
-            print(f"  Пересылки: {eng['total_forwards']}")
+            out(f"  Пересылки: {eng['total_forwards']}")
 
     # History
     history = get_channel_stats_history(14)
     if history:
-        print(f"\n  История (последние {len(history)} дней):")
-        print(f"  {'Дата':<12} {'Подписчики':>12} {'Постов':>8} {'Дельта':>8}")
-        print(f"  {'-'*12} {'-'*12} {'-'*8} {'-'*8}")
-        reversed_history = list(reversed(history))
-        for i, row in enumerate(reversed_history):
+        out(f"\n  История (последние {len(history)} дней):")
+        out(f"  {'Дата':<12} {'Подписчики':>12} {'Постов':>8} {'Дельта':>8}")
+        out(f"  {'-'*12} {'-'*12} {'-'*8} {'-'*8}")
+        prev = None
+        for row in reversed(history):  # oldest first
             delta = ""
-            if i > 0:
-                diff = row["subscribers"] - reversed_history[i - 1]["subscribers"]
+            if prev is not None:
+                diff = row["subscribers"] - prev["subscribers"]
                 delta = f"+{diff}" if diff >= 0 else str(diff)
-            print(f"  {row['date']:<12} {row['subscribers']:>12} {row['posts_total']:>8} {delta:>8}")
+            prev = row
+            out(f"  {row['date']:<12} {row['subscribers']:>12} {row['posts_total']:>8} {delta:>8}")
 
         # Growth summary
         if len(history) >= 2:
@@ -166,29 +188,35 @@ async def show_analytics(save_snapshot: bool = False) -> None:
             days = len(history)
             avg_daily = growth / days if days > 0 else 0
             sign = "+" if growth >= 0 else ""
-            print(f"\n  Рост за {days} дней: {sign}{growth} подписчиков")
-            print(f"  Среднедневной рост: {avg_daily:+.1f} подписчиков/день")
+            out(f"\n  Рост за {days} дней: {sign}{growth} подписчиков")
+            out(f"  Среднедневной рост: {avg_daily:+.1f} подписчиков/день")
 
     # Top products
     top = get_top_products(5)
     if top:
-        print(f"\n  Топ-5 товаров по рейтингу:")
+        out(f"\n  Топ-5 товаров по рейтингу:")
         for i, p in enumerate(top, 1):
-            raw = json.loads(p["raw_json"])
-            title = raw.get("title_ru", raw.get("title_cn", "???"))[:40]
-            print(f"  {i}. {title}")
-            print(f"     Score: {p['total_score']:.1f}/10 | Маржа: {p['margin_pct']:.0f}%")
+            title = (p["title_ru"] or p["title_cn"] or "???")[:40]
+            out(f"  {i}. {title}")
+            out(f"     Score: {p['total_score']:.1f}/10 | Маржа: {p['margin_pct']:.0f}%")
+
+    out("\n" + "=" * 50 + "\n")
+    sys.stdout.write("\n".join(lines) + "\n")
 
-    print("\n" + "=" * 50 + "\n")
 
+async def show_weekly_report(save_snapshot: bool = False, engagement: bool = True) -> None:
+    """Full weekly report: growth, engagement, posts by type, categories, top products.
 
-async def show_weekly_report(save_snapshot: bool = False) -> None:
-    """Full weekly report: growth, engagement, posts by type, categories, top products."""
+    With engagement=False the views/reactions sections (and their queries) are skipped.
+    """
     init_db()
+    # Collect the report and write it to stdout once at the end
+    lines: list[str] = []
+    out = lines.append
 
-    print("\n" + "=" * 60)
-    print("  ALGORA WEEKLY REPORT")
-    print("=" * 60)
+    out("\n" + "=" * 60)
+    out("  ALGORA WEEKLY REPORT")
+    out("=" * 60)
 
     # Channel stats
     info = await get_channel_info()
@@ -198,13 +226,13 @@ async def show_weekly_report(save_snapshot: bool = False) -> None:
     if save_snapshot and subscribers > 0:
         save_channel_stats(subscribers, posts_count)
 
-    print(f"\n  Подписчиков: {subscribers}")
-    print(f"  Всего постов: {posts_count}")
+    out(f"\n  Подписчиков: {subscribers}")
+    out(f"  Всего постов: {posts_count}")
 
     # Subscriber growth
     history = get_channel_stats_history(30)
     if history:
-        print(f"\n  --- Рост подписчиков (30 дней) ---")
+        out(f"\n  --- Рост подписчиков (30 дней) ---")
         if len(history) >= 2:
             newest = history[0]["subscribers"]
             oldest = history[-1]["subscribers"]
@@ -212,93 +240,95 @@ async def show_weekly_report(save_snapshot: bool = False) -> None:
             days = len(history)
             avg_daily = growth / days if days > 0 else 0
 
-            reversed_history = list(reversed(history))
             best_day = ("", 0)
             worst_day = ("", 0)
-            for i in range(1, len(reversed_history)):
-                diff = reversed_history[i]["subscribers"] - reversed_history[i - 1]["subscribers"]
+            for prev, row in pairwise(reversed(history)):  # oldest first
+                diff = row["subscribers"] - prev["subscribers"]
                 if diff > best_day[1]:
-                    best_day = (reversed_history[i]["date"], diff)
-                if diff < worst_day[1]:
-                    worst_day = (reversed_history[i]["date"], diff)
+                    best_day = (row["date"], diff)
+                elif diff < worst_day[1]:
+                    worst_day = (row["date"], diff)
 
             sign = "+" if growth >= 0 else ""
-            print(f"  Общий рост: {sign}{growth}")
-            print(f"  Средний/день: {avg_daily:+.1f}")
+            out(f"  Общий рост: {sign}{growth}")
+            out(f"  Средний/день: {avg_daily:+.1f}")
             if best_day[0]:
-                print(f"  Лучший день: {best_day[0]} (+{best_day[1]})")
+                out(f"  Лучший день: {best_day[0]} (+{best_day[1]})")
             if worst_day[0] and worst_day[1] < 0:
-                print(f"  Худший день: {worst_day[0]} ({worst_day[1]})")
+                out(f"  Худший день: {worst_day[0]} ({worst_day[1]})")
         else:
-            print("  Недостаточно данных")
+            out("  Недостаточно данных")
 
     # --- ENGAGEMENT ---
-    eng = get_engagement_summary()
+    eng = get_engagement_summary() if engagement else None
     if eng and eng.get("total_views"):
-        print(f"\n  --- Вовлечённость (Telegram) ---")
-        print(f"  Всего просмотров: {eng['total_views']:,}")
-        print(f"  Средние просмотры/пост: {eng['avg_views']:.0f}")
-        print(f"  Макс просмотры: {eng['max_views']}")
+        out(f"\n  --- Вовлечённость (Telegram) ---")
+        out(f"  Всего просмотров: {eng['total_views']:,}")
+        out(f"  Средние просмотры/пост: {eng['avg_views']:.0f}")
+        out(f"  Макс просмотры: {eng['max_views']}")
         if eng.get("total_forwards"):
-            print(f"  Пересылки: {eng['total_forwards']}")
+            out(f"  Пересылки: {eng['total_forwards']}")
         if eng.get("total_reactions"):
-            print(f"  Реакции: {eng['total_reactions']}")
+            out(f"  Реакции: {eng['total_reactions']}")
 
     # Engagement by post type
-    eng_by_type = get_engagement_by_post_type()
+    # Per-type / per-category breakdowns: one query for all four sections
+    agg = get_report_aggregates()
+
+    eng_by_type = agg["by_type_eng"] if engagement else []
     if eng_by_type:
-        print(f"\n  --- Просмотры по типам постов ---")
-        print(f"  {'Тип':<25} {'Постов':>7} {'Ср.просм.':>10} {'Макс':>7}")
-        print(f"  {'-'*25} {'-'*7} {'-'*10} {'-'*7}")
+        out(f"\n  --- Просмотры по типам постов ---")
+        out(f"  {'Тип':<25} {'Постов':>7} {'Ср.просм.':>10} {'Макс':>7}")
+        out(f"  {'-'*25} {'-'*7} {'-'*10} {'-'*7}")
         for row in eng_by_type:
             label = TYPE_LABELS.get(row["post_type"], row["post_type"] or "Другое")
-            print(f"  {label:<25} {row['cnt']:>7} {row['avg_views']:>10.0f} {row['max_views']:>7}")
+            out(f"  {label:<25} {row['cnt']:>7} {row['avg_views']:>10.0f} {row['max_views']:>7}")
 
     # Engagement by category
-    eng_by_cat = get_engagement_by_category()
+    eng_by_cat = agg["by_cat_eng"] if engagement else []
     if eng_by_cat:
-        print(f"\n  --- Просмотры по категориям ---")
-        print(f"  {'Категория':<25} {'Постов':>7} {'Ср.просм.':>10}")
-        print(f"  {'-'*25} {'-'*7} {'-'*10}")
+        out(f"\n  --- Просмотры по категориям ---")
+        out(f"  {'Категория':<25} {'Постов':>7} {'Ср.просм.':>10}")
+        out(f"  {'-'*25} {'-'*7} {'-'*10}")
         for row in eng_by_cat[:10]:
-            print(f"  {row['category']:<25} {row['cnt']:>7} {row['avg_views']:>10.0f}")
+            out(f"  {row['category']:<25} {row['cnt']:>7} {row['avg_views']:>10.0f}")
 
     # Top posts by views
-    top_viewed = get_top_posts_by_views(5)
+    top_viewed = get_top_posts_by_views(5) if engagement else []
     if top_viewed:
-        print(f"\n  --- Топ-5 постов по просмотрам ---")
+        out(f"\n  --- Топ-5 постов по просмотрам ---")
         for i, p in enumerate(top_viewed, 1):
             ptype = TYPE_LABELS.get(p["post_type"], p["post_type"] or "?")
             cat = p["category"] or ""
-            print(f"  {i}. {p['views']} просм. | {ptype} | {cat} | score={p['total_score']:.1f}")
+            out(f"  {i}. {p['views']} просм. | {ptype} | {cat} | score={p['total_score']:.1f}")
 
     # Posts by type (count)
-    by_type = get_posts_by_type()
+    by_type = agg["by_type_cnt"]
     if by_type:
-        print(f"\n  --- Посты по типам ---")
+        out(f"\n  --- Посты по типам ---")
         for row in by_type:
             label = TYPE_LABELS.get(row["post_type"], row["post_type"] or "Без типа")
-            print(f"  {label:<25} {row['cnt']:>5} постов")
+            out(f"  {label:<25} {row['cnt']:>5} постов")
 
     # Posts by category
-    by_cat = get_posts_by_category()
+    by_cat = agg["by_cat_cnt"]
     if by_cat:
-        print(f"\n  --- Посты по категориям (топ-10) ---")
+        out(f"\n  --- Посты по категориям (топ-10) ---")
         for row in by_cat[:10]:
             cat = row["category"] or "Без категории"
-            print(f"  {cat:<25} {row['cnt']:>5} постов")
+            out(f"  {cat:<25} {row['cnt']:>5} постов")
 
     # Top products
     top = get_top_products(10)
     if top:
-        print(f"\n  --- Топ-10 товаров по рейтингу ---")
+        out(f"\n  --- Топ-10 товаров по рейтингу ---")
         for i, p in enumerate(top, 1):
-            raw = json.loads(p["raw_json"])
-            title = raw.get("title_ru", raw.get("title_cn", "???"))[:35]
-            print(f"  {i:>2}. {title}")
-            print(f"      Score: {p['total_score']:.1f} | Маржа: {p['margin_pct']:.0f}% | Конкурентов: {p['wb_competitors']}")
+            title = (p["title_ru"] or p["title_cn"] or "???")[:35]
+            out(f"  {i:>2}. {title}")
+            out(f"      Score: {p['total_score']:.1f} | Маржа: {p['margin_pct']:.0f}% | Конкурентов: {p['wb_competitors']}")
 
-    print("\n" + "=" * 60 + "\n")
+    out("\n" + "=" * 60 + "\n")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main() -> None:
@@ -318,6 +348,11 @@ def main() -> None:
         action="store_true",
         help="Fetch real views/likes/reposts from Telegram and VK",
     )
+    parser.add_argument(
+        "--no-engagement",
+        action="store_true",
+        help="Skip views/reactions sections (growth and products only)",
+    )
     args = parser.parse_args()
 
     if args.update_engagement:
@@ -325,9 +360,9 @@ def main() -> None:
         print()  # separator
 
     if args.report:
-        asyncio.run(show_weekly_report(save_snapshot=args.save))
+        asyncio.run(show_weekly_report(save_snapshot=args.save, engagement=not args.no_engagement))
     elif not args.update_engagement:
-        asyncio.run(show_analytics(save_snapshot=args.save))
+        asyncio.run(show_analytics(save_snapshot=args.save, engagement=not args.no_engagement))
 
 
 if __name__ == "__main__":
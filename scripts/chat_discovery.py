@@ -9,6 +9,9 @@ Usage:
     # From curated list (no Telethon needed):
     python chat_discovery.py --segment T1
 
+    # Ignore cached search results (default: reuse results younger than 24h):
+    python chat_discovery.py --segment T1 --search --no-cache
+
     # Auto-join top N chats:
     python chat_discovery.py --segment T1 --search --join --top 10
 
@@ -22,10 +25,28 @@ import json
 import logging
 import os
 import sys
+import time
+from bisect import bisect_right
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
 
+try:
+    import ahocorasick  # optional: pip install pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import orjson  # optional: pip install orjson
+except ImportError:
+    orjson = None
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts._cache import load_chats, save_chats, search_key
+
 logger = logging.getLogger("chat_discovery")
 
 # ============================================================
@@ -129,11 +150,59 @@ SEGMENTS = {
 }
 
 
+def _lower_keywords(keywords: list[str]) -> tuple[str, ...]:
+    """Lowercased, interned, de-duplicated keywords (first occurrence wins)."""
+    return tuple(dict.fromkeys(sys.intern(kw.lower()) for kw in keywords))
+
+
+def _precompute_segments() -> None:
+    """Store lowercased keyword tuples on each segment ("_pos_lower", "_neg_lower").
+
+    Interning makes keywords shared between segments one object; de-duplication
+    keeps the substring fallback counting like the automaton (distinct keywords).
+    """
+    for seg in SEGMENTS.values():
+        seg["_pos_lower"] = _lower_keywords(seg["positive_keywords"])
+        seg["_neg_lower"] = _lower_keywords(seg["negative_keywords"])
+
+
+_precompute_segments()
+
+
+# Keyword matchers compiled once per segment, on first use: (positive, negative)
+# Aho-Corasick automatons, so a chat's text is scanned once per list instead of
+# once per keyword. None when pyahocorasick is not installed.
+
+def _build_automaton(keywords: tuple[str, ...]):
+    """Compile lowercased keywords into an automaton (value = keyword index)."""
+    if ahocorasick is None or not keywords:
+        return None
+    automaton = ahocorasick.Automaton()
+    for idx, kw in enumerate(keywords):
+        automaton.add_word(kw, idx)
+    automaton.make_automaton()
+    return automaton
+
+
+@lru_cache(maxsize=None)
+def _get_automata(segment_id: str) -> tuple:
+    """(positive, negative) automatons for a segment, built on first call."""
+    seg = SEGMENTS[segment_id]
+    return _build_automaton(seg["_pos_lower"]), _build_automaton(seg["_neg_lower"])
+
+
+def _count_matches(text: str, keywords: tuple[str, ...], automaton) -> int:
+    """Number of distinct (lowercased) keywords found in lowercased text."""
+    if automaton is not None:
+        return len({idx for _, idx in automaton.iter(text)})
+    return sum(1 for kw in keywords if kw in text)
+
+
 # ============================================================
 # DATA MODEL
 # ============================================================
 
-@dataclass
+@dataclass(slots=True)
 class DiscoveredChat:
     """A Telegram chat discovered through search or curated list."""
     username: str                    # TG username or invite link
@@ -155,6 +224,19 @@ class DiscoveredChat:
 # SCORING
 # ============================================================
 
+# Member-count steps and the size score for each band:
+# <1000 → 1.0, <5000 → 2.0, <15000 → 2.5, else 3.0
+_SIZE_STEPS = (1000, 5000, 15000)
+_SIZE_SCORES = (1.0, 2.0, 2.5, 3.0)
+
+
+def _size_score(members: int, min_members: int) -> float:
+    """Size component of score_chat (below min_members: still discoverable, just small)."""
+    if members < min_members:
+        return 0.5
+    return _SIZE_SCORES[bisect_right(_SIZE_STEPS, members)]
+
+
 def score_chat(
     title: str,
     description: str,
@@ -162,6 +244,8 @@ def score_chat(
     positive_keywords: list[str],
     negative_keywords: list[str],
     min_members: int,
+    segment_id: Optional[str] = None,
+    min_score: float = 0.0,
 ) -> float:
     """
     Score a chat 0-10 based on relevance to segment.
@@ -170,48 +254,96 @@ def score_chat(
     - keyword_match (0-5): how many positive keywords appear in title+description
     - size_score (0-3): member count relative to min_members
     - penalty (-5): negative keywords present
+
+    With segment_id, the segment's precomputed keywords and automatons are
+    used (the keyword lists must be that segment's).
+
+    min_score: callers that drop results below it get 0.0 as soon as the
+    negative keywords make it unreachable, without the positive scan.
     """
     text = f"{title} {description}".lower()
+    segment = SEGMENTS.get(segment_id)
+    if segment is not None:
+        pos_kw, neg_kw = segment["_pos_lower"], segment["_neg_lower"]
+        pos_ac, neg_ac = _get_automata(segment_id)
+    else:
+        pos_kw = tuple(kw.lower() for kw in positive_keywords)
+        neg_kw = tuple(kw.lower() for kw in negative_keywords)
+        pos_ac = neg_ac = None
+
+    size_score = _size_score(members, min_members)
+
+    # Negative keyword penalty first: it can rule the chat out on its own
+    neg_matches = _count_matches(text, neg_kw, neg_ac)
+    penalty = min(5.0, neg_matches * 2.5)
+    if penalty and 5.0 + size_score - penalty < min_score:
+        return 0.0
 
     # Keyword matching
-    matches = sum(1 for kw in positive_keywords if kw.lower() in text)
+    matches = _count_matches(text, pos_kw, pos_ac)
     keyword_score = min(5.0, matches * 1.0)
 
-    # Size scoring
-    if members < min_members:
-        size_score = 0.5  # Still discoverable, just small
-    elif members < 1000:
-        size_score = 1.0
-    elif members < 5000:
-        size_score = 2.0
-    elif members < 15000:
-        size_score = 2.5
-    else:
-        size_score = 3.0
+    return max(0.0, min(10.0, keyword_score + size_score - penalty))
 
-    # Negative keyword penalty
-    neg_matches = sum(1 for kw in negative_keywords if kw.lower() in text)
-    penalty = min(5.0, neg_matches * 2.5)
 
-    return max(0.0, min(10.0, keyword_score + size_score - penalty))
+def _needs_description(title: str, members: int, segment_id: str) -> bool:
+    """
+    Whether fetching the chat description is worth a round-trip.
+
+    No when even five description keywords could not lift the chat to the
+    2.0 threshold, or when the title alone scores >= 4.0 with no negative
+    keywords (the title-only score is kept for those).
+    """
+    segment = SEGMENTS[segment_id]
+    _, neg_ac = _get_automata(segment_id)
+    neg_matches = _count_matches(title.lower(), segment["_neg_lower"], neg_ac)
+
+    if not neg_matches:
+        title_score = score_chat(
+            title=title,
+            description="",
+            members=members,
+            positive_keywords=segment["positive_keywords"],
+            negative_keywords=segment["negative_keywords"],
+            min_members=segment["min_members"],
+            segment_id=segment_id,
+        )
+        if title_score >= 4.0:
+            return False
+
+    best = 5.0 + _size_score(members, segment["min_members"]) - min(5.0, neg_matches * 2.5)
+    return best >= 2.0
 
 
 # ============================================================
 # TELETHON SEARCH (requires active session)
 # ============================================================
 
+# chat_id → (fetched_at monotonic, description); survives repeated
+# searches within one process (e.g. several segments in a row)
+_DESCRIPTION_CACHE: dict[int, tuple[float, str]] = {}
+_DESCRIPTION_TTL_SEC = 6 * 3600
+
 async def search_telegram(
     segment_id: str,
     session_path: str = "session/growth_agent",
     api_id: Optional[int] = None,
     api_hash: Optional[str] = None,
+    seen: Optional[set[str]] = None,
+    max_candidates: Optional[int] = None,
 ) -> list[DiscoveredChat]:
     """
     Search Telegram for chats matching segment keywords.
     Requires Telethon session to be authorized.
+
+    seen: usernames already collected (e.g. seed chats). Those are skipped
+    before the description fetch; accepted results are added to it.
+    max_candidates: stop starting new queries once this many unique chats
+    were collected (queries already running still finish).
     """
     try:
         from telethon import TelegramClient
+        from telethon.tl.functions.channels import GetFullChannelRequest
         from telethon.tl.functions.contacts import SearchRequest
     except ImportError:
         logger.error("Telethon not installed. Run: pip install telethon")
@@ -230,13 +362,23 @@ async def search_telegram(
         return []
 
     discovered = []
+    candidates = []  # (chat, username, title, members, query)
     seen_ids = set()
+    if seen is None:
+        seen = set()
 
     client = TelegramClient(session_path, api_id, api_hash)
     await client.start()
 
-    try:
-        for query in segment["search_queries"]:
+    # Up to 3 searches in flight; each holds its slot through the 2s pause,
+    # so the per-query pacing towards Telegram stays as before
+    sem = asyncio.Semaphore(3)
+
+    async def _one_query(query: str) -> None:
+        async with sem:
+            if max_candidates and len(candidates) >= max_candidates:
+                logger.debug(f"Skipping '{query}': {len(candidates)} candidates collected")
+                return
             logger.info(f"Searching: '{query}'")
             try:
                 result = await client(SearchRequest(q=query, limit=20))
@@ -247,37 +389,11 @@ async def search_telegram(
                     seen_ids.add(chat.id)
 
                     username = getattr(chat, "username", "") or ""
+                    if username and username in seen:
+                        continue  # already known — skip the description round-trip
                     title = getattr(chat, "title", "") or ""
                     members = getattr(chat, "participants_count", 0) or 0
-
-                    # Get description if available
-                    description = ""
-                    try:
-                        full = await client.get_entity(chat)
-                        if hasattr(full, "about"):
-                            description = full.about or ""
-                    except Exception:
-                        pass
-
-                    relevance = score_chat(
-                        title=title,
-                        description=description,
-                        members=members,
-                        positive_keywords=segment["positive_keywords"],
-                        negative_keywords=segment["negative_keywords"],
-                        min_members=segment["min_members"],
-                    )
-
-                    if relevance >= 2.0:
-                        discovered.append(DiscoveredChat(
-                            username=username or str(chat.id),
-                            title=title,
-                            members=members,
-                            segment=segment_id,
-                            source="search",
-                            relevance_score=round(relevance, 1),
-                            notes=f"Found via query: '{query}'",
-                        ))
+                    candidates.append((chat, username, title, members, query))
 
                 # Rate limit: don't hammer TG API
                 await asyncio.sleep(2)
@@ -286,6 +402,57 @@ async def search_telegram(
                 logger.warning(f"Search failed for '{query}': {e}")
                 await asyncio.sleep(5)
 
+    fetch_sem = asyncio.Semaphore(5)
+
+    async def _description(chat) -> str:
+        cached = _DESCRIPTION_CACHE.get(chat.id)
+        if cached and time.monotonic() - cached[0] < _DESCRIPTION_TTL_SEC:
+            return cached[1]
+        async with fetch_sem:
+            try:
+                full = await client(GetFullChannelRequest(chat))
+                description = full.full_chat.about or ""
+            except Exception:
+                return ""
+        _DESCRIPTION_CACHE[chat.id] = (time.monotonic(), description)
+        return description
+
+    async def _no_description() -> str:
+        return ""
+
+    try:
+        await asyncio.gather(*(_one_query(q) for q in segment["search_queries"]))
+
+        # Descriptions only where they can change the verdict, fetched concurrently
+        descriptions = await asyncio.gather(*(
+            _description(chat) if _needs_description(title, members, segment_id) else _no_description()
+            for chat, _, title, members, _ in candidates
+        ))
+
+        for (chat, username, title, members, query), description in zip(candidates, descriptions):
+            relevance = score_chat(
+                title=title,
+                description=description,
+                members=members,
+                positive_keywords=segment["positive_keywords"],
+                negative_keywords=segment["negative_keywords"],
+                min_members=segment["min_members"],
+                segment_id=segment_id,
+                min_score=2.0,
+            )
+
+            if relevance >= 2.0:
+                seen.add(username or str(chat.id))
+                discovered.append(DiscoveredChat(
+                    username=username or str(chat.id),
+                    title=title,
+                    members=members,
+                    segment=segment_id,
+                    source="search",
+                    relevance_score=round(relevance, 1),
+                    notes=f"Found via query: '{query}'",
+                ))
+
     finally:
         await client.disconnect()
 
@@ -313,6 +480,7 @@ def get_seed_chats(segment_id: str) -> list[DiscoveredChat]:
             positive_keywords=segment["positive_keywords"],
             negative_keywords=segment["negative_keywords"],
             min_members=segment["min_members"],
+            segment_id=segment_id,
         )
         chats.append(DiscoveredChat(
             username=username,
@@ -332,16 +500,55 @@ def get_seed_chats(segment_id: str) -> list[DiscoveredChat]:
 # AUTO-JOIN
 # ============================================================
 
+# Telegram's join limit for a fresh account. After the first JOIN_BURST joins
+# each one waits 3600 / JOINS_PER_HOUR seconds, so the default top 10 takes
+# about 21 min (the old 10 s + 5 s per join pause did it in about 5).
+# Older accounts can pass a higher --joins-per-hour.
+JOINS_PER_HOUR = 20
+JOIN_BURST = 3
+
+
+class TokenBucket:
+    """Async token bucket: `burst` calls at once, then `rate` calls per second."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """Take one token, sleeping only when the bucket is empty."""
+        self._refill()
+        if self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+    def drain(self) -> None:
+        """Empty the bucket (after the server asked us to back off)."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
 async def join_chats(
     chats: list[DiscoveredChat],
     session_path: str = "session/growth_agent",
     api_id: Optional[int] = None,
     api_hash: Optional[str] = None,
     top_n: int = 10,
+    joins_per_hour: float = JOINS_PER_HOUR,
 ) -> list[DiscoveredChat]:
     """Join top N chats from the list. Returns list of successfully joined."""
     try:
         from telethon import TelegramClient
+        from telethon.errors import FloodWaitError
+        from telethon.tl.functions.channels import JoinChannelRequest
     except ImportError:
         logger.error("Telethon not installed")
         return []
@@ -350,27 +557,41 @@ async def join_chats(
     api_hash = api_hash or os.getenv("TG_API_HASH", "")
 
     joined = []
+    bucket = TokenBucket(rate=joins_per_hour / 3600, burst=JOIN_BURST)
     client = TelegramClient(session_path, api_id, api_hash)
     await client.start()
 
+    flooded = False
     try:
         for chat in chats[:top_n]:
-            try:
-                logger.info(f"Joining: @{chat.username} ({chat.title})")
-                await client.get_dialogs()  # Refresh dialog list
-                entity = await client.get_entity(chat.username)
-                await client(
-                    __import__("telethon.tl.functions.channels", fromlist=["JoinChannelRequest"])
-                    .JoinChannelRequest(entity)
-                )
-                chat.joined = True
-                joined.append(chat)
-                logger.info(f"  ✅ Joined: {chat.title}")
+            # A FloodWait is waited out and the same chat retried once; a second
+            # one means the account is still limited, so joining stops for this run.
+            for attempt in (1, 2):
                 # Don't join too fast
-                await asyncio.sleep(10 + (len(joined) * 5))
-            except Exception as e:
-                logger.warning(f"  ❌ Failed to join @{chat.username}: {e}")
-                await asyncio.sleep(15)
+                await bucket.acquire()
+                try:
+                    logger.info(f"Joining: @{chat.username} ({chat.title})")
+                    await client.get_dialogs()  # Refresh dialog list
+                    entity = await client.get_entity(chat.username)
+                    await client(JoinChannelRequest(entity))
+                    chat.joined = True
+                    joined.append(chat)
+                    logger.info(f"  ✅ Joined: {chat.title}")
+                except FloodWaitError as e:
+                    if attempt == 2:
+                        logger.warning(f"  ⏳ FloodWait {e.seconds}s again on @{chat.username}, stopping joins")
+                        flooded = True
+                        break
+                    logger.warning(f"  ⏳ FloodWait {e.seconds}s on @{chat.username}, retrying after it")
+                    await asyncio.sleep(e.seconds)
+                    bucket.drain()
+                    continue
+                except Exception as e:
+                    logger.warning(f"  ❌ Failed to join @{chat.username}: {e}")
+                    await asyncio.sleep(15)
+                break
+            if flooded:
+                break
     finally:
         await client.disconnect()
 
@@ -381,38 +602,62 @@ async def join_chats(
 # DISPLAY
 # ============================================================
 
+# Score bars for the integer part of a 0-10 score
+_BARS = tuple("█" * i + "░" * (10 - i) for i in range(11))
+
+
 def display_results(chats: list[DiscoveredChat], segment_id: str):
     """Print formatted results to console."""
     segment = SEGMENTS.get(segment_id, {})
-    print(f"\n{'='*70}")
-    print(f"  CHAT DISCOVERY: {segment.get('name', segment_id)}")
-    print(f"  Found: {len(chats)} chats")
-    print(f"{'='*70}\n")
+    # Collect the table and write it to stdout once at the end
+    lines: list[str] = []
+    out = lines.append
 
-    print(f"{'#':<4} {'Score':<7} {'Members':<9} {'Source':<8} {'Chat'}")
-    print(f"{'-'*4} {'-'*6} {'-'*8} {'-'*7} {'-'*40}")
+    out(f"\n{'='*70}")
+    out(f"  CHAT DISCOVERY: {segment.get('name', segment_id)}")
+    out(f"  Found: {len(chats)} chats")
+    out(f"{'='*70}\n")
+
+    out(f"{'#':<4} {'Score':<7} {'Members':<9} {'Source':<8} {'Chat'}")
+    out(f"{'-'*4} {'-'*6} {'-'*8} {'-'*7} {'-'*40}")
 
     for i, chat in enumerate(chats, 1):
-        score_bar = "█" * int(chat.relevance_score) + "░" * (10 - int(chat.relevance_score))
         joined_mark = " ✅" if chat.joined else ""
-        print(
+        out(
             f"{i:<4} {chat.relevance_score:<7.1f} {chat.members:<9,} {chat.source:<8} "
             f"@{chat.username} — {chat.title}{joined_mark}"
         )
         if chat.notes:
-            print(f"     {score_bar}  💬 {chat.notes}")
-        print()
+            out(f"     {_BARS[int(chat.relevance_score)]}  💬 {chat.notes}")
+        out("")
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def export_json(chats: list[DiscoveredChat]) -> str:
     """Export results as JSON string."""
+    data = [asdict(c) for c in chats]
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
     return json.dumps(
-        [asdict(c) for c in chats],
+        data,
         ensure_ascii=False,
         indent=2,
     )
 
 
+def export_json_to(chats: list[DiscoveredChat], path: str) -> None:
+    """Write results as JSON straight to a file (no intermediate string)."""
+    data = [asdict(c) for c in chats]
+    if orjson is not None:
+        # orjson already produces UTF-8 bytes
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
 # ============================================================
 # MAIN
 # ============================================================
@@ -426,6 +671,12 @@ async def main():
     parser.add_argument("--json", action="store_true", help="Output as JSON")
     parser.add_argument("--session", default="session/growth_agent", help="Telethon session path")
     parser.add_argument("--output", default=None, help="Save results to file")
+    parser.add_argument("--joins-per-hour", type=float, default=JOINS_PER_HOUR,
+                        help=f"Join rate after the first {JOIN_BURST} (default: {JOINS_PER_HOUR}, "
+                             f"i.e. ~21 min for 10 joins)")
+    parser.add_argument("--max-candidates", type=int, default=None,
+                        help="Stop searching after N unique chats (e.g. 3x --top; default: run all queries)")
+    parser.add_argument("--no-cache", action="store_true", help="Search again even if cached results are fresh")
     args = parser.parse_args()
 
     logging.basicConfig(
@@ -438,48 +689,75 @@ async def main():
         print(f"   Available: {', '.join(SEGMENTS.keys())}")
         sys.exit(1)
 
-    # Collect chats from all sources
-    all_chats: list[DiscoveredChat] = []
+    # Collect chats from all sources, one entry per username
+    merged: dict[str, DiscoveredChat] = {}
 
     # 1. Seed chats (always available)
     seeds = get_seed_chats(args.segment)
-    all_chats.extend(seeds)
+    merged.update((c.username, c) for c in seeds)
     logger.info(f"Loaded {len(seeds)} seed chats")
 
     # 2. Telegram search (optional)
     if args.search:
-        searched = await search_telegram(args.segment, session_path=args.session)
-        # Deduplicate by username
-        existing = {c.username for c in all_chats}
-        for chat in searched:
-            if chat.username not in existing:
-                all_chats.append(chat)
-                existing.add(chat.username)
-        logger.info(f"Found {len(searched)} chats via search ({len(all_chats)} total after dedup)")
+        # A fresh search skips usernames in `seen` before fetching descriptions;
+        # cached rows may still overlap (e.g. a chat promoted to seed since)
+        seen = set(merged)
+        # Computed before the search, which adds its own hits to `seen`
+        params = search_key(args.max_candidates, seen)
+        cached = [] if args.no_cache else load_chats(args.segment, params)
+        if cached:
+            searched = [
+                DiscoveredChat(
+                    username=row["username"],
+                    title=row["title"],
+                    members=row["members"],
+                    segment=args.segment,
+                    source="search",
+                    relevance_score=row["score"],
+                    notes=row["notes"],
+                    discovered_at=datetime.fromtimestamp(row["ts"], timezone.utc).isoformat(),
+                )
+                for row in cached
+            ]
+            logger.info(f"Using {len(searched)} cached search results (--no-cache to search again)")
+        else:
+            searched = await search_telegram(
+                args.segment, session_path=args.session, seen=seen, max_candidates=args.max_candidates,
+            )
+            save_chats(args.segment, params, searched)
+        # Same chat from two sources: keep the higher score, carry over the notes
+        for hit in searched:
+            known = merged.get(hit.username)
+            if known is None:
+                merged[hit.username] = hit
+            elif hit.relevance_score > known.relevance_score:
+                if known.notes:
+                    hit.notes = f"{known.notes}; {hit.notes}"
+                merged[hit.username] = hit
+        logger.info(f"Found {len(searched)} chats via search ({len(merged)} total after dedup)")
 
     # Sort by score
-    all_chats.sort(key=lambda c: c.relevance_score, reverse=True)
+    all_chats = sorted(merged.values(), key=lambda c: c.relevance_score, reverse=True)
 
     # 3. Auto-join
     if args.join:
-        joined = await join_chats(all_chats, session_path=args.session, top_n=args.top)
+        joined = await join_chats(
+            all_chats, session_path=args.session, top_n=args.top, joins_per_hour=args.joins_per_hour,
+        )
         logger.info(f"Joined {len(joined)} chats")
 
     # Output
     if args.json:
-        result = export_json(all_chats)
         if args.output:
-            with open(args.output, "w") as f:
-                f.write(result)
+            export_json_to(all_chats, args.output)
             print(f"Saved to {args.output}")
         else:
-            print(result)
+            print(export_json(all_chats))
     else:
         display_results(all_chats, args.segment)
 
     if args.output and not args.json:
-        with open(args.output, "w") as f:
-            f.write(export_json(all_chats))
+        export_json_to(all_chats, args.output)
         print(f"\nJSON saved to {args.output}")
 
 
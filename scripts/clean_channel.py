@@ -31,6 +31,9 @@ TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 CHANNEL = os.getenv("TELEGRAM_CHANNEL_ID", "")
 API = f"https://api.telegram.org/bot{TOKEN}"
 
+DELETE_BATCH_SIZE = 100  # deleteMessages limit (Bot API 7.0+)
+DELETE_CONCURRENCY = 10  # per-message fallback requests in flight
+
 
 async def list_recent_posts(client: httpx.AsyncClient, limit: int = 20):
     """List recent posts from the channel."""
@@ -76,24 +79,52 @@ async def delete_message(client: httpx.AsyncClient, message_id: int):
         return False
 
 
+async def _delete_limited(client: httpx.AsyncClient, sem: asyncio.Semaphore, message_id: int) -> bool:
+    async with sem:
+        return await delete_message(client, message_id)
+
+
 async def delete_message_range(client: httpx.AsyncClient, start_id: int, end_id: int):
-    """Delete a range of messages."""
+    """Delete a range of messages (up to 100 per deleteMessages call)."""
     print(f"\n🗑️  Deleting messages from {start_id} to {end_id}...")
 
-    deleted_count = 0
+    deleted_count = 0  # confirmed by per-message deleteMessage
+    requested_count = 0  # accepted by deleteMessages, which returns no count
     failed_count = 0
-
-    for msg_id in range(start_id, end_id + 1):
-        success = await delete_message(client, msg_id)
-        if success:
-            deleted_count += 1
+    sem = asyncio.Semaphore(DELETE_CONCURRENCY)
+
+    ids = list(range(start_id, end_id + 1))
+    for i in range(0, len(ids), DELETE_BATCH_SIZE):
+        if i:
+            # Small delay between batches to avoid rate limits
+            await asyncio.sleep(1)
+        batch = ids[i:i + DELETE_BATCH_SIZE]
+
+        resp = await client.post(
+            f"{API}/deleteMessages",
+            json={"chat_id": CHANNEL, "message_ids": batch},
+        )
+        data = resp.json()
+
+        if data.get("ok"):
+            # Missing IDs are skipped silently by the API, so these are only requested
+            print(f"[OK] Messages {batch[0]}..{batch[-1]} deleted")
+            requested_count += len(batch)
+        elif "can't be deleted" in (data.get("description") or ""):
+            # One undeletable message fails the whole batch — retry one by one,
+            # several in flight over the HTTP/2 connection
+            results = await asyncio.gather(*(_delete_limited(client, sem, msg_id) for msg_id in batch))
+            deleted_count += sum(results)
+            failed_count += len(results) - sum(results)
         else:
-            failed_count += 1
-        # Small delay to avoid rate limits
-        await asyncio.sleep(0.5)
+            print(f"[ERROR] Failed to delete messages {batch[0]}..{batch[-1]}: {data.get('description')}")
+            failed_count += len(batch)
 
     print("\n" + "=" * 70)
-    print(f"✓ Deleted: {deleted_count} messages")
+    if requested_count > 0:
+        print(f"✓ Requested: {requested_count} message IDs (IDs that no longer existed included)")
+    if deleted_count > 0 or not requested_count:
+        print(f"✓ Deleted: {deleted_count} messages")
     if failed_count > 0:
         print(f"✗ Failed: {failed_count} messages")
     print("=" * 70)
@@ -122,7 +153,10 @@ async def main():
         print("[ERROR] TELEGRAM_CHANNEL_ID not set")
         return
 
-    async with httpx.AsyncClient(timeout=30) as client:
+    # HTTP/2 (needs h2, see requirements.txt) multiplexes the concurrent
+    # fallback deletes over one kept-alive connection
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=20)
+    async with httpx.AsyncClient(http2=True, timeout=30, limits=limits) as client:
         # Verify bot access
         resp = await client.get(f"{API}/getMe")
         bot_data = resp.json()
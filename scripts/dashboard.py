@@ -3,15 +3,20 @@
 Usage:
     python -X utf8 -m scripts.dashboard              # generate data/dashboard.html
     python -X utf8 -m scripts.dashboard --open        # generate and open in browser
+    python -X utf8 -m scripts.dashboard --no-cache    # re-run all queries
+    python -X utf8 -m scripts.dashboard --compress    # also write .html.gz / .html.br
 """
 
 from __future__ import annotations
 
 import argparse
+import gzip
 import json
 import os
 import sys
+import time
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 os.environ.setdefault("PYTHONIOENCODING", "utf-8")
@@ -22,9 +27,20 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from loguru import logger
 
+try:
+    import orjson  # optional: pip install orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
 from src.config import DATA_DIR
 from src.db import (
     init_db,
+    get_data_signature,
     get_channel_stats_history,
     get_published_posts_count,
     get_top_products,
@@ -37,6 +53,13 @@ from src.db import (
 )
 
 
+def _js(value) -> str:
+    """JSON literal for embedding chart data in the page script."""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, ensure_ascii=False)
+
+
 TYPE_LABELS = {
     "product": "Находка дня",
     "niche_review": "Обзор ниши",
@@ -46,43 +69,228 @@ TYPE_LABELS = {
 }
 
 
-def _build_dashboard_html() -> str:
-    """Collect all data and render the dashboard HTML."""
-    init_db()
+# Static stylesheet, kept out of the page f-string (no brace escaping,
+# not re-formatted on each render)
+_STYLE = """<style>
+  * { margin: 0; padding: 0; box-sizing: border-box; }
+  body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+    background: #0f1117;
+    color: #e0e0e0;
+    padding: 20px;
+  }
+  h1 {
+    text-align: center;
+    font-size: 28px;
+    margin-bottom: 8px;
+    background: linear-gradient(135deg, #667eea, #764ba2);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+  }
+  .subtitle {
+    text-align: center;
+    color: #888;
+    font-size: 14px;
+    margin-bottom: 24px;
+  }
+  .kpi-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
+    gap: 16px;
+    margin-bottom: 24px;
+  }
+  .kpi {
+    background: #1a1d27;
+    border-radius: 12px;
+    padding: 20px;
+    text-align: center;
+    border: 1px solid #2a2d3a;
+  }
+  .kpi-value {
+    font-size: 32px;
+    font-weight: 700;
+    color: #667eea;
+  }
+  .kpi-value.green { color: #4ade80; }
+  .kpi-value.orange { color: #fb923c; }
+  .kpi-value.purple { color: #a78bfa; }
+  .kpi-label {
+    font-size: 13px;
+    color: #888;
+    margin-top: 4px;
+  }
+  .charts-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(480px, 1fr));
+    gap: 20px;
+    margin-bottom: 24px;
+  }
+  .chart-card {
+    background: #1a1d27;
+    border-radius: 12px;
+    padding: 16px;
+    border: 1px solid #2a2d3a;
+  }
+  .chart-card h3 {
+    font-size: 16px;
+    margin-bottom: 12px;
+    color: #ccc;
+  }
+  .chart-box {
+    width: 100%;
+    min-height: 320px;
+  }
+  table {
+    width: 100%;
+    border-collapse: collapse;
+    font-size: 14px;
+  }
+  th {
+    text-align: left;
+    padding: 8px 12px;
+    border-bottom: 2px solid #2a2d3a;
+    color: #888;
+    font-weight: 600;
+  }
+  td {
+    padding: 8px 12px;
+    border-bottom: 1px solid #1f2230;
+  }
+  tr:hover td { background: #1f2230; }
+  .score-badge {
+    display: inline-block;
+    padding: 2px 8px;
+    border-radius: 6px;
+    font-weight: 600;
+    font-size: 13px;
+  }
+  .score-high { background: #064e3b; color: #4ade80; }
+  .score-mid { background: #422006; color: #fb923c; }
+  .score-low { background: #450a0a; color: #f87171; }
+  .footer {
+    text-align: center;
+    color: #555;
+    font-size: 12px;
+    margin-top: 32px;
+    padding-top: 16px;
+    border-top: 1px solid #1f2230;
+  }
+  @media (max-width: 600px) {
+    .charts-grid { grid-template-columns: 1fr; }
+    .kpi-grid { grid-template-columns: repeat(2, 1fr); }
+  }
+</style>"""
+
+
+# Table row templates (%-formatted)
+_TOP_POST_ROW = (
+    '<tr><td>%d</td><td><b>%s</b></td><td>%s</td><td>%s</td>'
+    '<td><span class="score-badge %s">%s</span></td></tr>'
+)
+_TOP_PRODUCT_ROW = (
+    '<tr><td>%d</td><td>%s</td><td><span class="score-badge %s">%s</span></td>'
+    '<td>%.0f%%</td><td>%s</td></tr>'
+)
+_EMPTY_ROW = '<tr><td colspan="5" style="text-align:center;color:#555">Нет данных</td></tr>'
 
-    # --- Data collection ---
-    posts_count = get_published_posts_count()
+
+def _score_class(score: float) -> str:
+    return "score-high" if score >= 7 else "score-mid" if score >= 5 else "score-low"
+
+
+# Plotly layouts, fully merged here so the page does no object spreading
+_AXIS = {"gridcolor": "#1f2230", "tickfont": {"size": 11}}
+_BASE_LAYOUT = {
+    "paper_bgcolor": "transparent",
+    "plot_bgcolor": "transparent",
+    "font": {"color": "#aaa", "size": 12},
+    "margin": {"l": 50, "r": 20, "t": 10, "b": 50},
+    "xaxis": _AXIS,
+    "yaxis": _AXIS,
+}
+_LAYOUTS = {
+    "subs": {**_BASE_LAYOUT, "yaxis": {**_AXIS, "title": "Подписчики"}},
+    "eng_type": {
+        **_BASE_LAYOUT,
+        "barmode": "group",
+        "legend": {"font": {"size": 11}, "x": 0, "y": 1.15, "orientation": "h"},
+    },
+    "posts_pie": {**_BASE_LAYOUT, "showlegend": False, "margin": {"l": 20, "r": 20, "t": 10, "b": 20}},
+    "eng_cat": {
+        **_BASE_LAYOUT,
+        "margin": {"l": 140, "r": 20, "t": 10, "b": 40},
+        "xaxis": {**_AXIS, "title": "Ср. просмотры"},
+        "yaxis": {**_AXIS, "autorange": "reversed"},
+    },
+    "posts_cat": {
+        **_BASE_LAYOUT,
+        "xaxis": {**_AXIS, "tickangle": -45},
+        "yaxis": {**_AXIS, "title": "Количество постов"},
+        "margin": {"l": 50, "r": 20, "t": 10, "b": 100},
+    },
+}
+_LAYOUTS_JS = _js(_LAYOUTS)
+
+
+# Collected data is reused while the tables are unchanged (signature) and
+# for at most CACHE_TTL_SEC, across runs
+CACHE_PATH = DATA_DIR / "dashboard_cache.json"
+CACHE_TTL_SEC = 300
+
+
+# Independent read-only queries, run concurrently (sqlite3 releases the GIL
+# while SQLite works): name → (function, args)
+_QUERIES = {
+    "posts_count": (get_published_posts_count, ()),
+    "history": (get_channel_stats_history, (60,)),
+    "eng_summary": (get_engagement_summary, ()),
+    "eng_by_type": (get_engagement_by_post_type, ()),
+    "eng_by_cat": (get_engagement_by_category, ()),
+    "by_type": (get_posts_by_type, ()),
+    "by_cat": (get_posts_by_category, ()),
+    "top": (get_top_products, (10,)),
+    "top_viewed": (get_top_posts_by_views, (10,)),
+}
+
+
+def _run_queries() -> dict:
+    """Results of all _QUERIES by name; each worker uses its own connection."""
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = {name: pool.submit(fn, *args) for name, (fn, args) in _QUERIES.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def _collect_data() -> dict:
+    """Run the reporting queries and shape the results for the charts."""
+    q = _run_queries()
+    posts_count = q["posts_count"]
 
     # Subscriber history
-    history = get_channel_stats_history(60)
+    history = q["history"]
     hist_dates = []
     hist_subs = []
-    hist_posts = []
     if history:
         for row in reversed(history):
             hist_dates.append(row["date"])
             hist_subs.append(row["subscribers"])
-            hist_posts.append(row["posts_total"])
 
     # Engagement summary (replace None values with 0)
-    eng_raw = get_engagement_summary() or {}
+    eng_raw = q["eng_summary"] or {}
     eng = {k: (v if v is not None else 0) for k, v in eng_raw.items()}
 
     # Engagement by post type
-    eng_by_type = get_engagement_by_post_type()
+    eng_by_type = q["eng_by_type"]
     etype_labels = []
     etype_avg = []
     etype_max = []
-    etype_cnt = []
     for row in eng_by_type:
         label = TYPE_LABELS.get(row["post_type"], row["post_type"] or "Другое")
         etype_labels.append(label)
         etype_avg.append(row["avg_views"])
         etype_max.append(row["max_views"])
-        etype_cnt.append(row["cnt"])
 
     # Engagement by category
-    eng_by_cat = get_engagement_by_category()
+    eng_by_cat = q["eng_by_cat"]
     ecat_labels = []
     ecat_avg = []
     ecat_cnt = []
@@ -92,7 +300,7 @@ def _build_dashboard_html() -> str:
         ecat_cnt.append(row["cnt"])
 
     # Posts by type (pie chart)
-    by_type = get_posts_by_type()
+    by_type = q["by_type"]
     ptype_labels = []
     ptype_values = []
     for row in by_type:
@@ -101,7 +309,7 @@ def _build_dashboard_html() -> str:
         ptype_values.append(row["cnt"])
 
     # Posts by category (bar)
-    by_cat = get_posts_by_category()
+    by_cat = q["by_cat"]
     pcat_labels = []
     pcat_values = []
     for row in by_cat[:15]:
@@ -109,11 +317,10 @@ def _build_dashboard_html() -> str:
         pcat_values.append(row["cnt"])
 
     # Top products
-    top = get_top_products(10)
+    top = q["top"]
     top_data = []
     for p in top:
-        raw = json.loads(p["raw_json"])
-        title = raw.get("title_ru", raw.get("title_cn", "???"))[:40]
+        title = (p["title_ru"] or p["title_cn"] or "???")[:40]
         top_data.append({
             "title": title,
             "score": round(p["total_score"], 1),
@@ -122,7 +329,7 @@ def _build_dashboard_html() -> str:
         })
 
     # Top posts by views
-    top_viewed = get_top_posts_by_views(10)
+    top_viewed = q["top_viewed"]
     tv_data = []
     for p in top_viewed:
         ptype = TYPE_LABELS.get(p["post_type"], p["post_type"] or "?")
@@ -144,6 +351,79 @@ def _build_dashboard_html() -> str:
     elif hist_subs:
         latest_subs = hist_subs[-1]
 
+    return {
+        "posts_count": posts_count,
+        "hist_dates": hist_dates,
+        "hist_subs": hist_subs,
+        "eng": eng,
+        "etype_labels": etype_labels,
+        "etype_avg": etype_avg,
+        "etype_max": etype_max,
+        "ecat_labels": ecat_labels,
+        "ecat_avg": ecat_avg,
+        "ecat_cnt": ecat_cnt,
+        "ptype_labels": ptype_labels,
+        "ptype_values": ptype_values,
+        "pcat_labels": pcat_labels,
+        "pcat_values": pcat_values,
+        "top_data": top_data,
+        "tv_data": tv_data,
+        "latest_subs": latest_subs,
+        "growth_total": growth_total,
+        "growth_daily": growth_daily,
+    }
+
+
+def _load_data(use_cache: bool = True) -> dict:
+    """Collected dashboard data, from CACHE_PATH when still current."""
+    signature = get_data_signature()
+    if use_cache:
+        try:
+            cached = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            cached = None
+        if (
+            cached
+            and cached.get("signature") == signature
+            and time.time() - cached.get("saved_at", 0) < CACHE_TTL_SEC
+        ):
+            logger.info("Using cached dashboard data")
+            return cached["data"]
+
+    data = _collect_data()
+    CACHE_PATH.write_text(
+        json.dumps({"signature": signature, "saved_at": time.time(), "data": data}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    return data
+
+
+def _build_dashboard_html(use_cache: bool = True) -> str:
+    """Collect all data and render the dashboard HTML."""
+    init_db()
+
+    # --- Data collection ---
+    d = _load_data(use_cache)
+    posts_count = d["posts_count"]
+    hist_dates, hist_subs = d["hist_dates"], d["hist_subs"]
+    eng = d["eng"]
+    etype_labels, etype_avg, etype_max = d["etype_labels"], d["etype_avg"], d["etype_max"]
+    ecat_labels, ecat_avg, ecat_cnt = d["ecat_labels"], d["ecat_avg"], d["ecat_cnt"]
+    ptype_labels, ptype_values = d["ptype_labels"], d["ptype_values"]
+    pcat_labels, pcat_values = d["pcat_labels"], d["pcat_values"]
+    top_data, tv_data = d["top_data"], d["tv_data"]
+    latest_subs, growth_total, growth_daily = d["latest_subs"], d["growth_total"], d["growth_daily"]
+
+    # Table bodies
+    tv_rows = "".join([
+        _TOP_POST_ROW % (i, p["views"], p["type"], p["category"], _score_class(p["score"]), p["score"])
+        for i, p in enumerate(tv_data, 1)
+    ]) or _EMPTY_ROW
+    top_rows = "".join([
+        _TOP_PRODUCT_ROW % (i, p["title"], _score_class(p["score"]), p["score"], p["margin"], p["competitors"])
+        for i, p in enumerate(top_data, 1)
+    ]) or _EMPTY_ROW
+
     # Generation timestamp
     from datetime import datetime, timezone
     generated_at = datetime.now(timezone.utc).strftime("%d.%m.%Y %H:%M UTC")
@@ -155,116 +435,8 @@ def _build_dashboard_html() -> str:
 <meta charset="UTF-8">
 <meta name="viewport" content="width=device-width, initial-scale=1.0">
 <title>ALGORA Dashboard</title>
-<script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>
-<style>
-  * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-  body {{
-    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-    background: #0f1117;
-    color: #e0e0e0;
-    padding: 20px;
-  }}
-  h1 {{
-    text-align: center;
-    font-size: 28px;
-    margin-bottom: 8px;
-    background: linear-gradient(135deg, #667eea, #764ba2);
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-  }}
-  .subtitle {{
-    text-align: center;
-    color: #888;
-    font-size: 14px;
-    margin-bottom: 24px;
-  }}
-  .kpi-grid {{
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
-    gap: 16px;
-    margin-bottom: 24px;
-  }}
-  .kpi {{
-    background: #1a1d27;
-    border-radius: 12px;
-    padding: 20px;
-    text-align: center;
-    border: 1px solid #2a2d3a;
-  }}
-  .kpi-value {{
-    font-size: 32px;
-    font-weight: 700;
-    color: #667eea;
-  }}
-  .kpi-value.green {{ color: #4ade80; }}
-  .kpi-value.orange {{ color: #fb923c; }}
-  .kpi-value.purple {{ color: #a78bfa; }}
-  .kpi-label {{
-    font-size: 13px;
-    color: #888;
-    margin-top: 4px;
-  }}
-  .charts-grid {{
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(480px, 1fr));
-    gap: 20px;
-    margin-bottom: 24px;
-  }}
-  .chart-card {{
-    background: #1a1d27;
-    border-radius: 12px;
-    padding: 16px;
-    border: 1px solid #2a2d3a;
-  }}
-  .chart-card h3 {{
-    font-size: 16px;
-    margin-bottom: 12px;
-    color: #ccc;
-  }}
-  .chart-box {{
-    width: 100%;
-    min-height: 320px;
-  }}
-  table {{
-    width: 100%;
-    border-collapse: collapse;
-    font-size: 14px;
-  }}
-  th {{
-    text-align: left;
-    padding: 8px 12px;
-    border-bottom: 2px solid #2a2d3a;
-    color: #888;
-    font-weight: 600;
-  }}
-  td {{
-    padding: 8px 12px;
-    border-bottom: 1px solid #1f2230;
-  }}
-  tr:hover td {{ background: #1f2230; }}
-  .score-badge {{
-    display: inline-block;
-    padding: 2px 8px;
-    border-radius: 6px;
-    font-weight: 600;
-    font-size: 13px;
-  }}
-  .score-high {{ background: #064e3b; color: #4ade80; }}
-  .score-mid {{ background: #422006; color: #fb923c; }}
-  .score-low {{ background: #450a0a; color: #f87171; }}
-  .footer {{
-    text-align: center;
-    color: #555;
-    font-size: 12px;
-    margin-top: 32px;
-    padding-top: 16px;
-    border-top: 1px solid #1f2230;
-  }}
-  @media (max-width: 600px) {{
-    .charts-grid {{ grid-template-columns: 1fr; }}
-    .kpi-grid {{ grid-template-columns: repeat(2, 1fr); }}
-  }}
-</style>
+<script src="https://cdn.plot.ly/plotly-basic-2.35.2.min.js"></script>  <!-- scatter/bar/pie only -->
+{_STYLE}
 </head>
 <body>
 
@@ -336,13 +508,7 @@ def _build_dashboard_html() -> str:
         <tr><th>#</th><th>Просмотры</th><th>Тип</th><th>Категория</th><th>Score</th></tr>
       </thead>
       <tbody>
-        {''.join(
-            f'<tr><td>{i+1}</td><td><b>{p["views"]}</b></td><td>{p["type"]}</td>'
-            f'<td>{p["category"]}</td>'
-            f'<td><span class="score-badge {"score-high" if p["score"] >= 7 else "score-mid" if p["score"] >= 5 else "score-low"}">'
-            f'{p["score"]}</span></td></tr>'
-            for i, p in enumerate(tv_data)
-        ) if tv_data else '<tr><td colspan="5" style="text-align:center;color:#555">Нет данных</td></tr>'}
+        {tv_rows}
       </tbody>
     </table>
   </div>
@@ -357,13 +523,7 @@ def _build_dashboard_html() -> str:
         <tr><th>#</th><th>Товар</th><th>Score</th><th>Маржа %</th><th>Конкуренты WB</th></tr>
       </thead>
       <tbody>
-        {''.join(
-            f'<tr><td>{i+1}</td><td>{p["title"]}</td>'
-            f'<td><span class="score-badge {"score-high" if p["score"] >= 7 else "score-mid" if p["score"] >= 5 else "score-low"}">'
-            f'{p["score"]}</span></td>'
-            f'<td>{p["margin"]:.0f}%</td><td>{p["competitors"]}</td></tr>'
-            for i, p in enumerate(top_data)
-        ) if top_data else '<tr><td colspan="5" style="text-align:center;color:#555">Нет данных</td></tr>'}
+        {top_rows}
       </tbody>
     </table>
   </div>
@@ -374,99 +534,108 @@ def _build_dashboard_html() -> str:
 </div>
 
 <script>
-const plotLayout = {{
-  paper_bgcolor: 'transparent',
-  plot_bgcolor: 'transparent',
-  font: {{ color: '#aaa', size: 12 }},
-  margin: {{ l: 50, r: 20, t: 10, b: 50 }},
-  xaxis: {{ gridcolor: '#1f2230', tickfont: {{ size: 11 }} }},
-  yaxis: {{ gridcolor: '#1f2230', tickfont: {{ size: 11 }} }},
-}};
+const layouts = {_LAYOUTS_JS};
 const plotConfig = {{ responsive: true, displayModeBar: false }};
 
-// 1. Subscribers chart
-Plotly.newPlot('chart-subs', [{{
-  x: {json.dumps(hist_dates)},
-  y: {json.dumps(hist_subs)},
-  type: 'scatter',
-  mode: 'lines+markers',
-  line: {{ color: '#667eea', width: 2 }},
-  marker: {{ size: 5 }},
-  fill: 'tozeroy',
-  fillcolor: 'rgba(102,126,234,0.1)',
-}}], {{
-  ...plotLayout,
-  yaxis: {{ ...plotLayout.yaxis, title: 'Подписчики' }},
-}}, plotConfig);
-
-// 2. Engagement by post type (bar)
-Plotly.newPlot('chart-eng-type', [
-  {{
-    x: {json.dumps(etype_labels)},
-    y: {json.dumps(etype_avg)},
-    type: 'bar',
-    name: 'Ср. просмотры',
-    marker: {{ color: '#667eea', borderRadius: 4 }},
+// Charts are drawn when they scroll into view (200px ahead), not all at load
+const specs = {{
+  // 1. Subscribers chart
+  'chart-subs': {{
+    data: [{{
+      x: {_js(hist_dates)},
+      y: {_js(hist_subs)},
+      type: 'scatter',
+      mode: 'lines+markers',
+      line: {{ color: '#667eea', width: 2 }},
+      marker: {{ size: 5 }},
+      fill: 'tozeroy',
+      fillcolor: 'rgba(102,126,234,0.1)',
+    }}],
+    layout: layouts.subs,
+  }},
+
+  // 2. Engagement by post type (bar)
+  'chart-eng-type': {{
+    data: [
+      {{
+        x: {_js(etype_labels)},
+        y: {_js(etype_avg)},
+        type: 'bar',
+        name: 'Ср. просмотры',
+        marker: {{ color: '#667eea', borderRadius: 4 }},
+      }},
+      {{
+        x: {_js(etype_labels)},
+        y: {_js(etype_max)},
+        type: 'bar',
+        name: 'Макс просмотры',
+        marker: {{ color: 'rgba(102,126,234,0.3)' }},
+      }}
+    ],
+    layout: layouts.eng_type,
   }},
-  {{
-    x: {json.dumps(etype_labels)},
-    y: {json.dumps(etype_max)},
-    type: 'bar',
-    name: 'Макс просмотры',
-    marker: {{ color: 'rgba(102,126,234,0.3)' }},
-  }}
-], {{
-  ...plotLayout,
-  barmode: 'group',
-  legend: {{ font: {{ size: 11 }}, x: 0, y: 1.15, orientation: 'h' }},
-}}, plotConfig);
-
-// 3. Posts pie chart
-Plotly.newPlot('chart-posts-pie', [{{
-  labels: {json.dumps(ptype_labels)},
-  values: {json.dumps(ptype_values)},
-  type: 'pie',
-  hole: 0.45,
-  marker: {{
-    colors: ['#667eea', '#764ba2', '#4ade80', '#fb923c', '#f87171', '#38bdf8'],
+
+  // 3. Posts pie chart
+  'chart-posts-pie': {{
+    data: [{{
+      labels: {_js(ptype_labels)},
+      values: {_js(ptype_values)},
+      type: 'pie',
+      hole: 0.45,
+      marker: {{
+        colors: ['#667eea', '#764ba2', '#4ade80', '#fb923c', '#f87171', '#38bdf8'],
+      }},
+      textinfo: 'label+percent',
+      textfont: {{ size: 12 }},
+    }}],
+    layout: layouts.posts_pie,
+  }},
+
+  // 4. Engagement by category (horizontal bar)
+  'chart-eng-cat': {{
+    data: [{{
+      y: {_js(ecat_labels)},
+      x: {_js(ecat_avg)},
+      type: 'bar',
+      orientation: 'h',
+      marker: {{ color: '#a78bfa' }},
+      text: {_js(ecat_cnt)}.map(n => n + ' постов'),
+      textposition: 'auto',
+      textfont: {{ size: 11 }},
+    }}],
+    layout: layouts.eng_cat,
   }},
-  textinfo: 'label+percent',
-  textfont: {{ size: 12 }},
-}}], {{
-  ...plotLayout,
-  showlegend: false,
-  margin: {{ l: 20, r: 20, t: 10, b: 20 }},
-}}, plotConfig);
-
-// 4. Engagement by category (horizontal bar)
-Plotly.newPlot('chart-eng-cat', [{{
-  y: {json.dumps(ecat_labels)},
-  x: {json.dumps(ecat_avg)},
-  type: 'bar',
-  orientation: 'h',
-  marker: {{ color: '#a78bfa' }},
-  text: {json.dumps(ecat_cnt)}.map(n => n + ' постов'),
-  textposition: 'auto',
-  textfont: {{ size: 11 }},
-}}], {{
-  ...plotLayout,
-  margin: {{ l: 140, r: 20, t: 10, b: 40 }},
-  xaxis: {{ ...plotLayout.xaxis, title: 'Ср. просмотры' }},
-  yaxis: {{ ...plotLayout.yaxis, autorange: 'reversed' }},
-}}, plotConfig);
-
-// 5. Posts by category (bar)
-Plotly.newPlot('chart-posts-cat', [{{
-  x: {json.dumps(pcat_labels)},
-  y: {json.dumps(pcat_values)},
-  type: 'bar',
-  marker: {{ color: '#4ade80' }},
-}}], {{
-  ...plotLayout,
-  xaxis: {{ ...plotLayout.xaxis, tickangle: -45 }},
-  yaxis: {{ ...plotLayout.yaxis, title: 'Количество постов' }},
-  margin: {{ l: 50, r: 20, t: 10, b: 100 }},
-}}, plotConfig);
+
+  // 5. Posts by category (bar)
+  'chart-posts-cat': {{
+    data: [{{
+      x: {_js(pcat_labels)},
+      y: {_js(pcat_values)},
+      type: 'bar',
+      marker: {{ color: '#4ade80' }},
+    }}],
+    layout: layouts.posts_cat,
+  }},
+}};
+
+function draw(id) {{
+  const spec = specs[id];
+  Plotly.newPlot(id, spec.data, spec.layout, plotConfig);
+}}
+
+if ('IntersectionObserver' in window) {{
+  const observer = new IntersectionObserver((entries, obs) => {{
+    entries.forEach(e => {{
+      if (e.isIntersecting) {{
+        obs.unobserve(e.target);
+        draw(e.target.id);
+      }}
+    }});
+  }}, {{ rootMargin: '200px' }});
+  Object.keys(specs).forEach(id => observer.observe(document.getElementById(id)));
+}} else {{
+  Object.keys(specs).forEach(draw);
+}}
 </script>
 
 </body>
@@ -474,6 +643,24 @@ Plotly.newPlot('chart-posts-cat', [{{
     return html
 
 
+def _write_compressed(out_path: Path, html_bytes: bytes) -> None:
+    """Write .gz (and .br) copies next to the page.
+
+    For static hosts that serve precompressed files (nginx gzip_static /
+    brotli_static). Deterministic: the same page gives the same bytes.
+    """
+    gz_path = out_path.with_name(out_path.name + ".gz")
+    gz_path.write_bytes(gzip.compress(html_bytes, compresslevel=9, mtime=0))
+    logger.info("Compressed copy saved to {} ({} bytes)", gz_path, gz_path.stat().st_size)
+
+    if brotli is None:
+        logger.debug("brotli not installed, skipping .br")
+        return
+    br_path = out_path.with_name(out_path.name + ".br")
+    br_path.write_bytes(brotli.compress(html_bytes, quality=11, mode=brotli.MODE_TEXT))
+    logger.info("Compressed copy saved to {} ({} bytes)", br_path, br_path.stat().st_size)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Algora Dashboard Generator")
     parser.add_argument(
@@ -487,16 +674,29 @@ def main() -> None:
         default="",
         help="Output file path (default: data/dashboard.html)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached data and re-run all queries",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Also write gzip (and brotli, if installed) copies of the page",
+    )
     args = parser.parse_args()
 
     out_path = Path(args.output) if args.output else DATA_DIR / "dashboard.html"
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     logger.info("Generating dashboard...")
-    html = _build_dashboard_html()
-    out_path.write_text(html, encoding="utf-8")
+    html_bytes = _build_dashboard_html(use_cache=not args.no_cache).encode("utf-8")
+    out_path.write_bytes(html_bytes)
     logger.info("Dashboard saved to {}", out_path)
 
+    if args.compress:
+        _write_compressed(out_path, html_bytes)
+
     if args.open:
         webbrowser.open(str(out_path.resolve()))
         logger.info("Opened in browser")
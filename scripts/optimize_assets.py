@@ -0,0 +1,75 @@
+"""Losslessly shrink PNG assets with an external optimizer (release step).
+
+The avatar scripts save with a fast zlib level; run this once before
+uploading/committing final artifacts to get the small files back.
+
+Uses zopflipng if installed, otherwise advdef (AdvanceCOMP):
+    apt install zopfli        # or: brew install zopfli
+    apt install advancecomp
+
+Usage:
+    python -X utf8 scripts/optimize_assets.py                  # all assets/*.png
+    python -X utf8 scripts/optimize_assets.py assets/avatar_640.png
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ASSETS_DIR = Path(__file__).parent.parent / "assets"
+
+
+def _optimizer_command(path: Path) -> list[str] | None:
+    """Command that rewrites path in place, or None if no optimizer is installed."""
+    if shutil.which("zopflipng"):
+        return ["zopflipng", "-m", "-y", str(path), str(path)]
+    if shutil.which("advdef"):
+        return ["advdef", "-z", "-4", str(path)]
+    return None
+
+
+def optimize(path: Path) -> tuple[Path, int, int, bool]:
+    """Optimize one PNG. Returns (path, size_before, size_after, ok)."""
+    before = path.stat().st_size
+    cmd = _optimizer_command(path)
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    return path, before, path.stat().st_size, result.returncode == 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Optimize PNG assets for release")
+    parser.add_argument("paths", nargs="*", type=Path, help="PNG files (default: assets/*.png)")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(ASSETS_DIR.glob("*.png"))
+    if not paths:
+        print("No PNG files to optimize")
+        return
+
+    if _optimizer_command(paths[0]) is None:
+        print("[ERROR] Neither zopflipng nor advdef found in PATH")
+        sys.exit(1)
+
+    # Each optimizer run is single-threaded and CPU-bound in its own process
+    failed = False
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+        for path, before, after, ok in pool.map(optimize, paths):
+            if not ok:
+                failed = True
+                print(f"[ERROR] {path.name}: optimizer failed")
+                continue
+            saved = (before - after) / before * 100 if before else 0
+            print(f"[OK] {path.name}: {before / 1024:.1f} KB → {after / 1024:.1f} KB (-{saved:.0f}%)")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 import json
 import re
 import sqlite3
+import threading
 from datetime import datetime, timezone
 
 from loguru import logger
@@ -17,6 +18,33 @@ def get_connection() -> sqlite3.Connection:
     return conn
 
 
+_local = threading.local()
+
+
+def _reader() -> sqlite3.Connection:
+    """Shared autocommit connection for the reporting queries (get_*).
+
+    Analytics and the dashboard run a dozen small queries per report; one
+    connection keeps SQLite's page cache warm instead of reopening the file
+    for each. Writers keep their own short-lived connections.
+
+    One connection per thread (sqlite3 connections are bound to their
+    creating thread), so the dashboard can run its queries in a thread pool.
+    """
+    conn = getattr(_local, "read_conn", None)
+    if conn is None:
+        conn = sqlite3.connect(str(DB_PATH), isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA cache_size = -20000")  # ~20 MB
+        conn.execute("PRAGMA query_only = 1")
+        _local.read_conn = conn
+    return conn
+
+
+# Tables the reports read; writes to them invalidate cached report data
+_REPORT_TABLES = ("analyzed_products", "published_posts", "channel_stats", "post_engagement")
+
+
 def init_db() -> None:
     """Create tables if they don't exist."""
     conn = get_connection()
@@ -93,8 +121,23 @@ def init_db() -> None:
             checked_at TEXT NOT NULL,
             UNIQUE(message_id, platform)
         );
+
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0);
         """
     )
+    # Any insert/update/delete on a reporting table, from any process,
+    # bumps data_version; get_data_signature() reads it.
+    for table in _REPORT_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_version"
+                f" AFTER {event} ON {table}"
+                " BEGIN UPDATE data_version SET version = version + 1 WHERE id = 1; END"
+            )
     conn.commit()
 
     # Migrate: add 'platform' column to existing published_posts table
@@ -477,45 +520,56 @@ def save_channel_stats(subscribers: int, posts_total: int) -> None:
 
 def get_channel_stats_history(days: int = 30) -> list[dict]:
     """Get channel stats for the last N days."""
-    conn = get_connection()
-    try:
-        rows = conn.execute(
-            """SELECT date, subscribers, posts_total
-            FROM channel_stats
-            ORDER BY date DESC
-            LIMIT ?""",
-            (days,),
-        ).fetchall()
-        return [dict(row) for row in rows]
-    finally:
-        conn.close()
+    conn = _reader()
+    rows = conn.execute(
+        """SELECT date, subscribers, posts_total
+        FROM channel_stats
+        ORDER BY date DESC
+        LIMIT ?""",
+        (days,),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_data_signature() -> list:
+    """Cheap fingerprint of the reporting tables; changes whenever a report would.
+
+    The write counter kept by the data_version triggers (see init_db), so
+    in-place UPDATEs such as the engagement refresh or init_db backfills
+    count too, not just new rows. Used by the dashboard to decide whether
+    its cached aggregates are still current.
+    """
+    conn = _reader()
+    row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+    return list(row)
 
 
 def get_published_posts_count() -> int:
     """Get total count of published posts."""
-    conn = get_connection()
-    try:
-        row = conn.execute("SELECT COUNT(*) as cnt FROM published_posts").fetchone()
-        return row["cnt"] if row else 0
-    finally:
-        conn.close()
+    conn = _reader()
+    row = conn.execute("SELECT COUNT(*) as cnt FROM published_posts").fetchone()
+    return row["cnt"] if row else 0
 
 
 def get_top_products(limit: int = 10) -> list[dict]:
-    """Get top analyzed products by score."""
-    conn = get_connection()
-    try:
-        rows = conn.execute(
-            """SELECT source_url, raw_json, total_score, margin_pct,
-                      wb_avg_price, wb_competitors, ai_insight
-            FROM analyzed_products
-            ORDER BY total_score DESC
-            LIMIT ?""",
-            (limit,),
-        ).fetchall()
-        return [dict(row) for row in rows]
-    finally:
-        conn.close()
+    """Get top analyzed products by score.
+
+    Titles are pulled out of raw_json by SQLite (JSON1) instead of shipping
+    the whole blob to Python.
+    """
+    conn = _reader()
+    rows = conn.execute(
+        """SELECT source_url,
+                  json_extract(raw_json, '$.title_ru') AS title_ru,
+                  json_extract(raw_json, '$.title_cn') AS title_cn,
+                  total_score, margin_pct,
+                  wb_avg_price, wb_competitors, ai_insight
+        FROM analyzed_products
+        ORDER BY total_score DESC
+        LIMIT ?""",
+        (limit,),
+    ).fetchall()
+    return [dict(row) for row in rows]
 
 
 def save_post_engagement(
@@ -575,6 +629,33 @@ def update_post_engagement(
         conn.close()
 
 
+def update_post_engagement_many(
+    rows: list[tuple[int, str, int, int, int]],
+) -> None:
+    """Update engagement for many posts in one transaction.
+
+    rows: (message_id, platform, views, forwards, reactions) tuples.
+    """
+    if not rows:
+        return
+    checked_at = datetime.now(timezone.utc).isoformat()
+    conn = get_connection()
+    try:
+        conn.executemany(
+            """UPDATE post_engagement
+            SET views = ?, forwards = ?, reactions = ?,
+                checked_at = ?
+            WHERE message_id = ? AND platform = ?""",
+            [
+                (views, forwards, reactions, checked_at, message_id, platform)
+                for message_id, platform, views, forwards, reactions in rows
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
 def get_posts_for_engagement_update() -> list[dict]:
     """Get all posts that need engagement metrics updated."""
     conn = get_connection()
@@ -592,112 +673,146 @@ def get_posts_for_engagement_update() -> list[dict]:
 
 def get_engagement_summary() -> dict:
     """Get aggregate engagement stats for reporting."""
-    conn = get_connection()
-    try:
-        row = conn.execute(
-            """SELECT
-                COUNT(*) as total_posts,
-                SUM(views) as total_views,
-                SUM(forwards) as total_forwards,
-                SUM(reactions) as total_reactions,
-                ROUND(AVG(CASE WHEN views > 0 THEN views END), 1) as avg_views,
-                MAX(views) as max_views
-            FROM post_engagement
-            WHERE platform = 'telegram'"""
-        ).fetchone()
-        return dict(row) if row else {}
-    finally:
-        conn.close()
+    conn = _reader()
+    row = conn.execute(
+        """SELECT
+            COUNT(*) as total_posts,
+            SUM(views) as total_views,
+            SUM(forwards) as total_forwards,
+            SUM(reactions) as total_reactions,
+            ROUND(AVG(CASE WHEN views > 0 THEN views END), 1) as avg_views,
+            MAX(views) as max_views
+        FROM post_engagement
+        WHERE platform = 'telegram'"""
+    ).fetchone()
+    return dict(row) if row else {}
 
 
 def get_engagement_by_post_type() -> list[dict]:
     """Get average engagement grouped by post type."""
-    conn = get_connection()
-    try:
-        rows = conn.execute(
-            """SELECT post_type,
-                      COUNT(*) as cnt,
-                      ROUND(AVG(views), 1) as avg_views,
-                      SUM(views) as total_views,
-                      MAX(views) as max_views
-            FROM post_engagement
-            WHERE platform = 'telegram' AND views > 0
-            GROUP BY post_type
-            ORDER BY avg_views DESC"""
-        ).fetchall()
-        return [dict(row) for row in rows]
-    finally:
-        conn.close()
+    conn = _reader()
+    rows = conn.execute(
+        """SELECT post_type,
+                  COUNT(*) as cnt,
+                  ROUND(AVG(views), 1) as avg_views,
+                  SUM(views) as total_views,
+                  MAX(views) as max_views
+        FROM post_engagement
+        WHERE platform = 'telegram' AND views > 0
+        GROUP BY post_type
+        ORDER BY avg_views DESC"""
+    ).fetchall()
+    return [dict(row) for row in rows]
 
 
 def get_engagement_by_category() -> list[dict]:
     """Get average engagement grouped by category."""
-    conn = get_connection()
-    try:
-        rows = conn.execute(
-            """SELECT category,
-                      COUNT(*) as cnt,
-                      ROUND(AVG(views), 1) as avg_views,
-                      SUM(views) as total_views
-            FROM post_engagement
-            WHERE platform = 'telegram' AND views > 0
-                  AND category IS NOT NULL AND category != ''
-            GROUP BY category
-            ORDER BY avg_views DESC"""
-        ).fetchall()
-        return [dict(row) for row in rows]
-    finally:
-        conn.close()
+    conn = _reader()
+    rows = conn.execute(
+        """SELECT category,
+                  COUNT(*) as cnt,
+                  ROUND(AVG(views), 1) as avg_views,
+                  SUM(views) as total_views
+        FROM post_engagement
+        WHERE platform = 'telegram' AND views > 0
+              AND category IS NOT NULL AND category != ''
+        GROUP BY category
+        ORDER BY avg_views DESC"""
+    ).fetchall()
+    return [dict(row) for row in rows]
 
 
 def get_top_posts_by_views(limit: int = 5) -> list[dict]:
     """Get top posts by view count, joined with published_posts for text."""
-    conn = get_connection()
-    try:
-        rows = conn.execute(
-            """SELECT pe.message_id, pe.platform, pe.post_type, pe.category,
-                      pe.views, pe.forwards, pe.reactions, pe.total_score,
-                      pp.source_url
-            FROM post_engagement pe
-            LEFT JOIN published_posts pp
-                ON pe.message_id = pp.message_id AND pe.platform = pp.platform
-            WHERE pe.views > 0
-            ORDER BY pe.views DESC
-            LIMIT ?""",
-            (limit,),
-        ).fetchall()
-        return [dict(row) for row in rows]
-    finally:
-        conn.close()
+    conn = _reader()
+    rows = conn.execute(
+        """SELECT pe.message_id, pe.platform, pe.post_type, pe.category,
+                  pe.views, pe.forwards, pe.reactions, pe.total_score,
+                  pp.source_url
+        FROM post_engagement pe
+        LEFT JOIN published_posts pp
+            ON pe.message_id = pp.message_id AND pe.platform = pp.platform
+        WHERE pe.views > 0
+        ORDER BY pe.views DESC
+        LIMIT ?""",
+        (limit,),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_report_aggregates() -> dict[str, list[dict]]:
+    """The four per-type / per-category breakdowns of the weekly report in one query.
+
+    Returns {"by_type_eng", "by_cat_eng", "by_type_cnt", "by_cat_cnt"} with the
+    same rows and ordering as get_engagement_by_post_type,
+    get_engagement_by_category, get_posts_by_type and get_posts_by_category
+    (category engagement rows also carry max_views).
+    """
+    conn = _reader()
+    rows = conn.execute(
+        """SELECT 'by_type_eng' AS grp, post_type AS key, COUNT(*) AS cnt,
+                  ROUND(AVG(views), 1) AS avg_views, SUM(views) AS total_views,
+                  MAX(views) AS max_views
+        FROM post_engagement
+        WHERE platform = 'telegram' AND views > 0
+        GROUP BY post_type
+        UNION ALL
+        SELECT 'by_cat_eng', category, COUNT(*),
+               ROUND(AVG(views), 1), SUM(views), MAX(views)
+        FROM post_engagement
+        WHERE platform = 'telegram' AND views > 0
+              AND category IS NOT NULL AND category != ''
+        GROUP BY category
+        UNION ALL
+        SELECT 'by_type_cnt', post_type, COUNT(*), NULL, NULL, NULL
+        FROM published_posts
+        WHERE post_type IS NOT NULL
+        GROUP BY post_type
+        UNION ALL
+        SELECT 'by_cat_cnt', category, COUNT(*), NULL, NULL, NULL
+        FROM published_posts
+        WHERE category IS NOT NULL AND category != ''
+        GROUP BY category
+        ORDER BY grp, avg_views DESC, cnt DESC"""
+    ).fetchall()
+
+    result: dict[str, list[dict]] = {
+        "by_type_eng": [], "by_cat_eng": [], "by_type_cnt": [], "by_cat_cnt": [],
+    }
+    for row in rows:
+        grp = row["grp"]
+        key_name = "post_type" if grp.startswith("by_type") else "category"
+        item = {key_name: row["key"], "cnt": row["cnt"]}
+        if grp.endswith("_eng"):
+            item["avg_views"] = row["avg_views"]
+            item["total_views"] = row["total_views"]
+            item["max_views"] = row["max_views"]
+        result[grp].append(item)
+    return result
 
 
 def get_posts_by_type() -> list[dict]:
     """Get post counts grouped by post_type."""
-    conn = get_connection()
-    try:
-        rows = conn.execute(
-            """SELECT post_type, COUNT(*) as cnt
-            FROM published_posts
-            WHERE post_type IS NOT NULL
-            GROUP BY post_type
-            ORDER BY cnt DESC"""
-        ).fetchall()
-        return [dict(row) for row in rows]
-    finally:
-        conn.close()
+    conn = _reader()
+    rows = conn.execute(
+        """SELECT post_type, COUNT(*) as cnt
+        FROM published_posts
+        WHERE post_type IS NOT NULL
+        GROUP BY post_type
+        ORDER BY cnt DESC"""
+    ).fetchall()
+    return [dict(row) for row in rows]
 
 
 def get_posts_by_category() -> list[dict]:
     """Get post counts grouped by category."""
-    conn = get_connection()
-    try:
-        rows = conn.execute(
-            """SELECT category, COUNT(*) as cnt
-            FROM published_posts
-            WHERE category IS NOT NULL AND category != ''
-            GROUP BY category
-            ORDER BY cnt DESC"""
-        ).fetchall()
-        return [dict(row) for row in rows]
-    finally:
-        conn.close()
+    conn = _reader()
+    rows = conn.execute(
+        """SELECT category, COUNT(*) as cnt
+        FROM published_posts
+        WHERE category IS NOT NULL AND category != ''
+        GROUP BY category
+        ORDER BY cnt DESC"""
+    ).fetchall()
+    return [dict(row) for row in rows]
+
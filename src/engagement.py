@@ -14,7 +14,7 @@ from loguru import logger
 from src.config import TELEGRAM_CHANNEL_ID, VK_API_TOKEN, VK_GROUP_ID, VK_API_VERSION
 
 
-async def fetch_telegram_views(message_id: int) -> dict:
+async def fetch_telegram_views(client: httpx.AsyncClient, message_id: int) -> dict:
     """Fetch view count for a Telegram channel post via public embed widget.
 
     Returns {"views": int} or empty dict on failure.
@@ -25,10 +25,9 @@ async def fetch_telegram_views(message_id: int) -> dict:
 
     url = f"https://t.me/{channel}/{message_id}?embed=1&userpic=false"
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(url, headers={
-                "User-Agent": "Mozilla/5.0 (compatible; AlgoraBot/1.0)",
-            })
+        resp = await client.get(url, headers={
+            "User-Agent": "Mozilla/5.0 (compatible; AlgoraBot/1.0)",
+        })
 
         if resp.status_code != 200:
             logger.debug("TG embed HTTP {}: msg={}", resp.status_code, message_id)
@@ -51,7 +50,7 @@ async def fetch_telegram_views(message_id: int) -> dict:
         return {}
 
 
-async def fetch_vk_engagement(post_id: int) -> dict:
+async def fetch_vk_engagement(client: httpx.AsyncClient, post_id: int) -> dict:
     """Fetch engagement metrics for a VK wall post via wall.getById.
 
     Returns {"views": int, "likes": int, "reposts": int, "comments": int}
@@ -64,16 +63,15 @@ async def fetch_vk_engagement(post_id: int) -> dict:
     posts_param = f"{owner_id}_{post_id}"
 
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.post(
-                "https://api.vk.com/method/wall.getById",
-                data={
-                    "access_token": VK_API_TOKEN,
-                    "v": VK_API_VERSION,
-                    "posts": posts_param,
-                },
-            )
-            data = resp.json()
+        resp = await client.post(
+            "https://api.vk.com/method/wall.getById",
+            data={
+                "access_token": VK_API_TOKEN,
+                "v": VK_API_VERSION,
+                "posts": posts_param,
+            },
+        )
+        data = resp.json()
 
         items = data.get("response", {}).get("items", [])
         if not items: